@@ -50,7 +50,6 @@ class BulkIdentifyRequest(BaseModel):
 @router.get("/providers")
 async def get_providers(db: DbSession) -> dict:
     """Get available AI providers, checking both env vars and database settings."""
-    import json
     import os
     from grimoire.models import Setting
     from grimoire.processors.ai_identifier import check_ollama_available, get_ollama_url
@@ -61,24 +60,10 @@ async def get_providers(db: DbSession) -> dict:
     
     # Also check database settings for API keys
     if not openai_available:
-        query = select(Setting).where(Setting.key == "openai_api_key")
-        result = await db.execute(query)
-        setting = result.scalar_one_or_none()
-        if setting:
-            try:
-                openai_available = bool(json.loads(setting.value))
-            except (json.JSONDecodeError, TypeError):
-                pass
+        openai_available = bool(await Setting.get(db, "openai_api_key"))
     
     if not anthropic_available:
-        query = select(Setting).where(Setting.key == "anthropic_api_key")
-        result = await db.execute(query)
-        setting = result.scalar_one_or_none()
-        if setting:
-            try:
-                anthropic_available = bool(json.loads(setting.value))
-            except (json.JSONDecodeError, TypeError):
-                pass
+        anthropic_available = bool(await Setting.get(db, "anthropic_api_key"))
     
     # Get Ollama URL from database or env var
     ollama_url = await get_ollama_url()
@@ -98,16 +83,12 @@ async def get_providers(db: DbSession) -> dict:
 @router.get("/codex/status")
 async def get_codex_status(db: DbSession) -> dict:
     """Check Codex API availability."""
-    import json
     from grimoire.models import Setting
     from grimoire.services.codex import CodexClient
     from grimoire.config import settings as app_settings
     
     # Get API key from database settings (where frontend saves it)
-    query = select(Setting).where(Setting.key == "codex_api_key")
-    result = await db.execute(query)
-    setting = result.scalar_one_or_none()
-    db_api_key = json.loads(setting.value) if setting else None
+    db_api_key = await Setting.get(db, "codex_api_key")
     
     # Use API key from DB if set, otherwise fall back to env var
     api_key = db_api_key or app_settings.codex_api_key
@@ -3,7 +3,7 @@
 from pathlib import Path
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from sqlalchemy import select
 
@@ -19,6 +19,7 @@ from grimoire.services.exclusion_service import (
     seed_default_rules,
 )
 from grimoire.models import ExclusionRuleType
+from grimoire.models.exclusion import MAX_PATTERN_LENGTH
 
 router = APIRouter()
 
@@ -26,7 +27,7 @@ router = APIRouter()
 class CreateRuleRequest(BaseModel):
     """Request to create an exclusion rule."""
     rule_type: str
-    pattern: str
+    pattern: str = Field(..., max_length=MAX_PATTERN_LENGTH)
     description: str | None = None
     priority: int = 0
     enabled: bool = True
@@ -34,7 +35,7 @@ class CreateRuleRequest(BaseModel):
 
 class UpdateRuleRequest(BaseModel):
     """Request to update an exclusion rule."""
-    pattern: str | None = None
+    pattern: str | None = Field(None, max_length=MAX_PATTERN_LENGTH)
     description: str | None = None
     priority: int | None = None
     enabled: bool | None = None
@@ -1,5 +1,7 @@
 """Export API endpoints for Foundry VTT and Obsidian."""
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel, Field
@@ -124,7 +126,8 @@ async def export_to_obsidian(
         raise HTTPException(status_code=500, detail=f"Extraction failed: {e}")
 
     # Convert to Obsidian format
-    files = export_to_obsidian_vault(
+    files = await asyncio.to_thread(
+        export_to_obsidian_vault,
         monsters=extracted.get("monsters"),
         spells=extracted.get("spells"),
         items=extracted.get("items"),
@@ -1,5 +1,7 @@
 """Extraction API endpoints for TOC, tables, and content parsing."""
 
+import asyncio
+
 from pydantic import BaseModel, Field
 from fastapi import APIRouter, HTTPException, Query
 from sqlalchemy import select
@@ -152,8 +154,8 @@ async def get_product_statblocks(
     if not product.file_path:
         raise HTTPException(status_code=400, detail="Product has no file path")
 
-    statblocks = extract_statblocks_from_pdf(
-        product.file_path, start_page, end_page, system
+    statblocks = await asyncio.to_thread(
+        extract_statblocks_from_pdf, product.file_path, start_page, end_page, system
     )
 
     return {
@@ -182,7 +184,9 @@ async def get_product_statblocks_vtt(
     if not product.file_path:
         raise HTTPException(status_code=400, detail="Product has no file path")
 
-    statblocks = extract_statblocks_from_pdf(product.file_path, start_page, end_page)
+    statblocks = await asyncio.to_thread(
+        extract_statblocks_from_pdf, product.file_path, start_page, end_page
+    )
 
     return {
         "product_id": product_id,
@@ -214,10 +218,13 @@ async def get_product_images(
         raise HTTPException(status_code=400, detail="Product has no file path")
 
     if maps_only:
-        images = extract_maps_only(product.file_path, start_page, end_page)
+        images = await asyncio.to_thread(
+            extract_maps_only, product.file_path, start_page, end_page
+        )
     else:
-        images = extract_images_from_pdf(
-            product.file_path, start_page, end_page, min_width, min_height
+        images = await asyncio.to_thread(
+            extract_images_from_pdf,
+            product.file_path, start_page, end_page, min_width, min_height,
         )
 
     return {
@@ -246,8 +253,9 @@ async def get_product_image_data(
     if not product.file_path:
         raise HTTPException(status_code=400, detail="Product has no file path")
 
-    images = extract_images_from_pdf(
-        product.file_path, start_page, end_page, include_data=True
+    images = await asyncio.to_thread(
+        extract_images_from_pdf,
+        product.file_path, start_page, end_page, include_data=True,
     )
 
     if image_index < 0 or image_index >= len(images):
@@ -9,7 +9,7 @@ from grimoire.models import Product, ProductEmbedding
 from grimoire.services.processor import get_extracted_text
 from grimoire.services.embeddings import (
     generate_embeddings,
-    find_similar,
+    find_similar_in_matrix,
     chunk_text,
     get_available_providers,
 )
@@ -108,6 +108,20 @@ async def embed_product(
     }
 
 
+async def _load_embedding_records(
+    db: DbSession,
+    similar: list[tuple[int, float]],
+) -> dict[int, ProductEmbedding]:
+    """Fetch the embedding rows behind a list of (id, score) matches."""
+    if not similar:
+        return {}
+    query = select(ProductEmbedding).where(
+        ProductEmbedding.id.in_([emb_id for emb_id, _ in similar])
+    )
+    result = await db.execute(query)
+    return {emb.id: emb for emb in result.scalars().all()}
+
+
 @router.post("/search")
 async def semantic_search(
     db: DbSession,
@@ -126,37 +140,31 @@ async def semantic_search(
         raise HTTPException(status_code=500, detail=f"Embedding failed: {e}")
 
     # In-memory search using cosine similarity
-    emb_query = select(ProductEmbedding)
-    emb_result = await db.execute(emb_query)
-    stored_embeddings = list(emb_result.scalars().all())
+    matrix, emb_ids = await ProductEmbedding.load_matrix(db, dim=len(query_vector))
 
-    if not stored_embeddings:
+    if not emb_ids:
         return {
             "query": request.query,
             "results": [],
             "message": "No embeddings found. Run /embed on products first.",
         }
 
-    # Build embedding list for search
-    embeddings_list = [
-        (emb.id, emb.get_embedding_vector())
-        for emb in stored_embeddings
-    ]
-
     # Find similar using cosine similarity
-    similar = find_similar(
+    similar = find_similar_in_matrix(
         query_vector,
-        embeddings_list,
+        matrix,
+        emb_ids,
         request.top_k * 2,
         request.threshold,
     )
+    emb_records = await _load_embedding_records(db, similar)
 
     # Get product info and dedupe
     seen_products = set()
     results = []
 
     for emb_id, score in similar:
-        emb_record = next((e for e in stored_embeddings if e.id == emb_id), None)
+        emb_record = emb_records.get(emb_id)
         if not emb_record:
             continue
 
@@ -472,11 +480,9 @@ async def natural_language_query(
         raise HTTPException(status_code=500, detail=f"Embedding failed: {e}")
 
     # Get stored embeddings
-    emb_query = select(ProductEmbedding)
-    emb_result = await db.execute(emb_query)
-    stored_embeddings = list(emb_result.scalars().all())
+    matrix, emb_ids = await ProductEmbedding.load_matrix(db, dim=len(query_vector))
 
-    if not stored_embeddings:
+    if not emb_ids:
         return {
             "query": request.query,
             "interpretation": interpretation,
@@ -485,24 +491,21 @@ async def natural_language_query(
         }
 
     # Find similar
-    embeddings_list = [
-        (emb.id, emb.get_embedding_vector())
-        for emb in stored_embeddings
-    ]
-
-    similar = find_similar(
+    similar = find_similar_in_matrix(
         query_vector,
-        embeddings_list,
+        matrix,
+        emb_ids,
         request.top_k * 3,
         0.4,
     )
+    emb_records = await _load_embedding_records(db, similar)
 
     # Get products and apply filters
     seen_products = set()
     results = []
 
     for emb_id, score in similar:
-        emb_record = next((e for e in stored_embeddings if e.id == emb_id), None)
+        emb_record = emb_records.get(emb_id)
         if not emb_record:
             continue
 
@@ -565,27 +568,25 @@ async def find_similar_products(
 ) -> dict:
     """Find products similar to a given product."""
     # Get embeddings for the source product
-    source_query = select(ProductEmbedding).where(ProductEmbedding.product_id == product_id)
-    source_result = await db.execute(source_query)
-    source_embeddings = list(source_result.scalars().all())
+    source_matrix, source_ids = await ProductEmbedding.load_matrix(
+        db, ProductEmbedding.product_id == product_id
+    )
 
-    if not source_embeddings:
+    if not source_ids:
         raise HTTPException(
             status_code=400,
             detail="Product has no embeddings. Run /embed first."
         )
 
     # Average the source embeddings
-    import numpy as np
-    source_vectors = [e.get_embedding_vector() for e in source_embeddings]
-    avg_vector = np.mean(source_vectors, axis=0).tolist()
+    avg_vector = source_matrix.mean(axis=0)
 
     # Get all other embeddings
-    other_query = select(ProductEmbedding).where(ProductEmbedding.product_id != product_id)
-    other_result = await db.execute(other_query)
-    other_embeddings = list(other_result.scalars().all())
+    other_matrix, other_ids = await ProductEmbedding.load_matrix(
+        db, ProductEmbedding.product_id != product_id, dim=source_matrix.shape[1]
+    )
 
-    if not other_embeddings:
+    if not other_ids:
         return {
             "source_product_id": product_id,
             "similar": [],
@@ -593,19 +594,15 @@ async def find_similar_products(
         }
 
     # Find similar
-    embeddings_list = [
-        (emb.id, emb.get_embedding_vector())
-        for emb in other_embeddings
-    ]
-
-    similar = find_similar(avg_vector, embeddings_list, top_k * 3, 0.5)
+    similar = find_similar_in_matrix(avg_vector, other_matrix, other_ids, top_k * 3, 0.5)
+    emb_records = await _load_embedding_records(db, similar)
 
     # Dedupe by product
     seen_products = set()
     results = []
 
     for emb_id, score in similar:
-        emb_record = next((e for e in other_embeddings if e.id == emb_id), None)
+        emb_record = emb_records.get(emb_id)
         if not emb_record:
             continue
 
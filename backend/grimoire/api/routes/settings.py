@@ -119,17 +119,10 @@ async def delete_setting(db: DbSession, key: str) -> None:
 @router.get("/codex/status", response_model=CodexStatusResponse)
 async def get_codex_status(db: DbSession) -> CodexStatusResponse:
     """Get Codex API connection status."""
-    # Get API key from database settings (where frontend saves it)
-    query = select(Setting).where(Setting.key == "codex_api_key")
-    result = await db.execute(query)
-    setting = result.scalar_one_or_none()
-    db_api_key = json.loads(setting.value) if setting else None
-    
-    # Get contribute_enabled from database
-    query = select(Setting).where(Setting.key == "codex_contribute_enabled")
-    result = await db.execute(query)
-    setting = result.scalar_one_or_none()
-    db_contribute_enabled = json.loads(setting.value) if setting else False
+    # Get API key and contribute_enabled from database settings (where
+    # the frontend saves them)
+    db_api_key = await Setting.get(db, "codex_api_key")
+    db_contribute_enabled = await Setting.get(db, "codex_contribute_enabled", False)
     
     # Use API key from DB if set, otherwise fall back to env var
     api_key = db_api_key or app_settings.codex_api_key
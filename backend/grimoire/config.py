@@ -47,12 +47,25 @@ class Settings(BaseSettings):
     codex_contribute_enabled: bool = False  # Opt-in
     codex_timeout: int = 10  # seconds
     
+    # AI providers
+    ai_max_connections: int = 100  # Pooled HTTP connections shared by AI calls
+    ai_concurrency: int = 20  # In-flight requests per bulk identify; keep <= ai_max_connections
+    ai_cache_enabled: bool = True  # Reuse responses for identical AI requests
+    ai_cache_ttl: int = 30 * 24 * 3600  # seconds
+    ai_cache_max_entries: int = 10_000
+    
     # Rate limiting
     rate_limit_enabled: bool = True
     rate_limit_requests: int = 100  # requests per window
     rate_limit_window: int = 60  # seconds
     ai_rate_limit_requests: int = 10  # AI endpoints are more expensive
     ai_rate_limit_window: int = 60
+    rate_limit_max_buckets: int = 100_000  # Hard cap on tracked clients
+    rate_limit_redis_url: str = ""  # e.g. redis://redis:6379/0; shares limits across workers
+    
+    # Response caching
+    cache_max_entry_bytes: int = 256 * 1024  # Larger responses are not cached
+    cache_max_variants_per_path: int = 50  # Query-param variants kept per endpoint
     
     @field_validator('secret_key')
     @classmethod
@@ -1,8 +1,10 @@
 """Database connection and session management."""
 
+import reprlib
 from collections.abc import AsyncGenerator
+from typing import Any
 
-from sqlalchemy import event
+from sqlalchemy import event, inspect
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -15,6 +17,27 @@ class Base(DeclarativeBase):
     pass
 
 
+_repr = reprlib.Repr()
+_repr.maxstring = 60
+
+
+def safe_repr(obj: Any, *attrs: str) -> str:
+    """Build a model __repr__ from attributes that are already loaded.
+
+    Unloaded or expired attributes print as <unloaded> instead of triggering
+    a lazy load, so repr() never queries the database (or fails on a
+    detached instance). Long strings are truncated.
+    """
+    state = inspect(obj)
+    # Transient/pending objects have nothing to load; read them directly
+    unloaded = () if state.transient or state.pending else state.unloaded
+    fields = ", ".join(
+        f"{attr}=<unloaded>" if attr in unloaded else f"{attr}={_repr.repr(getattr(obj, attr))}"
+        for attr in attrs
+    )
+    return f"<{type(obj).__name__}({fields})>"
+
+
 # SQLite connection settings for better concurrency
 def set_sqlite_pragma(dbapi_connection, connection_record):
     """Set SQLite pragmas for better concurrent access."""
@@ -30,6 +53,7 @@ engine = create_async_engine(
     echo=settings.debug,
     future=True,
     pool_pre_ping=True,  # Check connections before use
+    insertmanyvalues_page_size=1000,  # Rows per batched INSERT statement
 )
 
 # Register the pragma setter for SQLite connections
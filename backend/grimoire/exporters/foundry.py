@@ -3,10 +3,13 @@ Foundry VTT export functionality.
 Converts extracted content to Foundry VTT compatible JSON format.
 """
 
+from __future__ import annotations
+
 import json
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from grimoire.schemas.ttrpg import Monster, Spell, MagicItem, RandomTable, NPC
+if TYPE_CHECKING:
+    from grimoire.schemas.ttrpg import Monster, Spell, MagicItem, RandomTable, NPC
 
 
 def ability_modifier(score: int) -> int:
@@ -3,68 +3,111 @@ Obsidian markdown export functionality.
 Converts extracted content to Obsidian-compatible markdown with YAML frontmatter.
 """
 
-from typing import Any
-from grimoire.schemas.ttrpg import Monster, Spell, MagicItem, RandomTable, NPC, Location
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+import yaml
+
+if TYPE_CHECKING:
+    from grimoire.schemas.ttrpg import Monster, Spell, MagicItem, RandomTable, NPC, Location
+
+# Prefer the libyaml-backed dumper when PyYAML was built with it
+_YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def _as_dict(entity: Any) -> dict:
+    """Normalize a schema model or plain dict to a dict without None fields."""
+    if isinstance(entity, dict):
+        return entity
+    if hasattr(entity, 'model_dump'):
+        return entity.model_dump(mode='python', exclude_none=True)
+    return entity.__dict__
+
+
+def _frontmatter(fields: dict[str, Any]) -> str:
+    """Render a YAML frontmatter block, skipping None values."""
+    body = yaml.dump(
+        {k: v for k, v in fields.items() if v is not None},
+        Dumper=_YamlDumper,
+        sort_keys=False,
+        default_flow_style=None,  # scalar-only lists like tags render as [a, b]
+        allow_unicode=True,
+        width=4096,
+    )
+    return f"---\n{body}---"
+
+
+_ACTION_SECTIONS = (
+    ("actions", "Actions", "Action"),
+    ("bonus_actions", "Bonus Actions", "Bonus Action"),
+    ("reactions", "Reactions", "Reaction"),
+    ("legendary_actions", "Legendary Actions", "Legendary Action"),
+)
+
+
+def _render_actions(lines: list[str], heading: str | None, items: list | None, default_name: str) -> None:
+    """Append an optional section heading and one paragraph per named entry."""
+    if heading:
+        lines.append(f"## {heading}\n")
+    lines.extend(
+        f"***{a.get('name', default_name)}.*** {a.get('description', '')}\n"
+        for a in items or ()
+        if isinstance(a, dict)
+    )
 
 
 def monster_to_obsidian(monster: Monster | dict) -> str:
     """Convert a monster to Obsidian markdown with YAML frontmatter."""
-    if isinstance(monster, dict):
-        m = monster
-    else:
-        m = monster.model_dump() if hasattr(monster, 'model_dump') else monster.__dict__
+    m = _as_dict(monster)
+
+    name = m.get("name", "Unknown")
+    size = m.get("size")
+    ctype = m.get("creature_type")
+    alignment = m.get("alignment")
+    cr = m.get("challenge_rating")
+    ac = m.get("armor_class")
+    hp = m.get("hit_points")
 
-    lines = ["---"]
-    
     # YAML frontmatter
-    lines.append(f"name: \"{m.get('name', 'Unknown')}\"")
-    lines.append("type: monster")
-    if m.get("size"):
-        lines.append(f"size: {m.get('size')}")
-    if m.get("creature_type"):
-        lines.append(f"creature_type: {m.get('creature_type')}")
-    if m.get("alignment"):
-        lines.append(f"alignment: {m.get('alignment')}")
-    if m.get("challenge_rating"):
-        lines.append(f"cr: \"{m.get('challenge_rating')}\"")
-    if m.get("armor_class"):
-        lines.append(f"ac: {m.get('armor_class')}")
-    if m.get("hit_points"):
-        lines.append(f"hp: {m.get('hit_points')}")
-    if m.get("source_page"):
-        lines.append(f"source_page: {m.get('source_page')}")
-    lines.append("tags:")
-    lines.append("  - monster")
-    if m.get("creature_type"):
-        lines.append(f"  - {m.get('creature_type').lower()}")
-    
-    lines.append("---")
+    lines = [_frontmatter({
+        "name": name,
+        "type": "monster",
+        "size": size or None,
+        "creature_type": ctype or None,
+        "alignment": alignment or None,
+        "cr": str(cr) if cr else None,
+        "ac": ac or None,
+        "hp": hp or None,
+        "source_page": m.get("source_page") or None,
+        "tags": ["monster", ctype.lower()] if ctype else ["monster"],
+    })]
     lines.append("")
     
     # Title
-    lines.append(f"# {m.get('name', 'Unknown')}")
+    lines.append(f"# {name}")
     lines.append("")
     
     # Basic info
-    size = m.get("size", "Medium")
-    ctype = m.get("creature_type", "creature")
-    alignment = m.get("alignment", "")
-    lines.append(f"*{size} {ctype}{', ' + alignment if alignment else ''}*")
+    lines.append(f"*{size or 'Medium'} {ctype or 'creature'}{', ' + alignment if alignment else ''}*")
     lines.append("")
     
     # Stats block
     lines.append("---")
     lines.append("")
     
-    if m.get("armor_class"):
-        ac_type = f" ({m.get('armor_type')})" if m.get("armor_type") else ""
-        lines.append(f"**Armor Class** {m.get('armor_class')}{ac_type}")
+    if ac:
+        armor_type = m.get("armor_type")
+        ac_type = f" ({armor_type})" if armor_type else ""
+        lines.append(f"**Armor Class** {ac}{ac_type}")
     
-    if m.get("hit_points"):
-        hd = f" ({m.get('hit_dice')})" if m.get("hit_dice") else ""
-        lines.append(f"**Hit Points** {m.get('hit_points')}{hd}")
+    if hp:
+        hit_dice = m.get("hit_dice")
+        hd = f" ({hit_dice})" if hit_dice else ""
+        lines.append(f"**Hit Points** {hp}{hd}")
     
-    speed = m.get("speed", {})
+    speed = m.get("speed")
     if speed:
         speed_parts = []
         for stype, sval in speed.items():
@@ -127,7 +170,7 @@ def monster_to_obsidian(monster: Monster | dict) -> str:
     if m.get("condition_immunities"):
         lines.append(f"**Condition Immunities** {', '.join(m['condition_immunities'])}")
     
-    senses = m.get("senses", {})
+    senses = m.get("senses")
     if senses:
         sense_list = ", ".join(f"{k} {v}" for k, v in senses.items())
         lines.append(f"**Senses** {sense_list}")
@@ -135,96 +178,72 @@ def monster_to_obsidian(monster: Monster | dict) -> str:
     if m.get("languages"):
         lines.append(f"**Languages** {', '.join(m['languages'])}")
     
-    if m.get("challenge_rating"):
-        xp = f" ({m.get('experience_points'):,} XP)" if m.get("experience_points") else ""
-        lines.append(f"**Challenge** {m.get('challenge_rating')}{xp}")
+    if cr:
+        xp_value = m.get("experience_points")
+        xp = f" ({xp_value:,} XP)" if xp_value else ""
+        lines.append(f"**Challenge** {cr}{xp}")
     
     lines.append("")
     lines.append("---")
     lines.append("")
     
     # Traits
-    for trait in m.get("traits", []):
-        if isinstance(trait, dict):
-            lines.append(f"***{trait.get('name', 'Trait')}.*** {trait.get('description', '')}")
-            lines.append("")
-    
-    # Actions
-    if m.get("actions"):
-        lines.append("## Actions")
-        lines.append("")
-        for action in m["actions"]:
-            if isinstance(action, dict):
-                lines.append(f"***{action.get('name', 'Action')}.*** {action.get('description', '')}")
-                lines.append("")
-    
-    # Bonus Actions
-    if m.get("bonus_actions"):
-        lines.append("## Bonus Actions")
-        lines.append("")
-        for action in m["bonus_actions"]:
-            if isinstance(action, dict):
-                lines.append(f"***{action.get('name', 'Bonus Action')}.*** {action.get('description', '')}")
-                lines.append("")
-    
-    # Reactions
-    if m.get("reactions"):
-        lines.append("## Reactions")
-        lines.append("")
-        for action in m["reactions"]:
-            if isinstance(action, dict):
-                lines.append(f"***{action.get('name', 'Reaction')}.*** {action.get('description', '')}")
-                lines.append("")
-    
-    # Legendary Actions
-    if m.get("legendary_actions"):
-        lines.append("## Legendary Actions")
-        lines.append("")
-        for action in m["legendary_actions"]:
-            if isinstance(action, dict):
-                lines.append(f"***{action.get('name', 'Legendary Action')}.*** {action.get('description', '')}")
-                lines.append("")
+    _render_actions(lines, None, m.get("traits"), "Trait")
+    
+    # Actions, bonus actions, reactions, legendary actions
+    for key, heading, default_name in _ACTION_SECTIONS:
+        if m.get(key):
+            _render_actions(lines, heading, m[key], default_name)
     
     return "\n".join(lines)
 
 
+_ORDINALS = ("0th", "1st", "2nd", "3rd", "4th", "5th", "6th", "7th", "8th", "9th")
+
+
+def _spell_level_text(level: Any, school: str) -> str:
+    """Build the spell subtitle, e.g. '3rd-level evocation' or 'Evocation cantrip'.
+
+    Extracted levels aren't always integers ("3", None, "cantrip"); anything
+    int() can't read is rendered as-is.
+    """
+    try:
+        level = int(level)
+    except (TypeError, ValueError):
+        level = str(level)
+    return _level_text(level, school)
+
+
+@lru_cache(maxsize=256)
+def _level_text(level: int | str, school: str) -> str:
+    if level == 0:
+        return f"{school} cantrip" if school else "Cantrip"
+    if isinstance(level, int) and 0 <= level < 10:
+        ordinal = _ORDINALS[level]
+    else:
+        ordinal = f"{level}th"
+    return f"{ordinal}-level {school.lower()}" if school else f"{ordinal}-level"
+
+
 def spell_to_obsidian(spell: Spell | dict) -> str:
     """Convert a spell to Obsidian markdown."""
-    if isinstance(spell, dict):
-        s = spell
-    else:
-        s = spell.model_dump() if hasattr(spell, 'model_dump') else spell.__dict__
+    s = _as_dict(spell)
 
-    lines = ["---"]
-    
     # YAML frontmatter
-    lines.append(f"name: \"{s.get('name', 'Unknown')}\"")
-    lines.append("type: spell")
-    lines.append(f"level: {s.get('level', 0)}")
-    if s.get("school"):
-        lines.append(f"school: {s.get('school')}")
-    if s.get("ritual"):
-        lines.append("ritual: true")
-    if s.get("concentration"):
-        lines.append("concentration: true")
-    if s.get("classes"):
-        lines.append(f"classes: [{', '.join(s['classes'])}]")
-    lines.append("tags:")
-    lines.append("  - spell")
-    if s.get("school"):
-        lines.append(f"  - {s.get('school').lower()}")
-    
-    lines.append("---")
+    lines = [_frontmatter({
+        "name": s.get("name", "Unknown"),
+        "type": "spell",
+        "level": s.get("level", 0),
+        "school": s.get("school") or None,
+        "ritual": True if s.get("ritual") else None,
+        "concentration": True if s.get("concentration") else None,
+        "classes": list(s["classes"]) if s.get("classes") else None,
+        "tags": ["spell", s["school"].lower()] if s.get("school") else ["spell"],
+    })]
     lines.append("")
     
     # Title
-    level = s.get("level", 0)
-    school = s.get("school", "")
-    if level == 0:
-        level_text = f"{school} cantrip" if school else "Cantrip"
-    else:
-        ordinal = {1: "1st", 2: "2nd", 3: "3rd"}.get(level, f"{level}th")
-        level_text = f"{ordinal}-level {school.lower()}" if school else f"{ordinal}-level"
+    level_text = _spell_level_text(s.get("level", 0), s.get("school", ""))
     
     ritual_tag = " (ritual)" if s.get("ritual") else ""
     
@@ -274,28 +293,18 @@ def spell_to_obsidian(spell: Spell | dict) -> str:
 
 def magic_item_to_obsidian(item: MagicItem | dict) -> str:
     """Convert a magic item to Obsidian markdown."""
-    if isinstance(item, dict):
-        i = item
-    else:
-        i = item.model_dump() if hasattr(item, 'model_dump') else item.__dict__
+    i = _as_dict(item)
 
-    lines = ["---"]
-    
     # YAML frontmatter
-    lines.append(f"name: \"{i.get('name', 'Unknown')}\"")
-    lines.append("type: magic-item")
-    if i.get("rarity"):
-        lines.append(f"rarity: {i.get('rarity')}")
-    if i.get("item_type"):
-        lines.append(f"item_type: {i.get('item_type')}")
-    if i.get("requires_attunement"):
-        lines.append("attunement: true")
-    lines.append("tags:")
-    lines.append("  - magic-item")
-    if i.get("rarity"):
-        lines.append(f"  - {i.get('rarity').lower().replace(' ', '-')}")
-    
-    lines.append("---")
+    rarity_tag = i["rarity"].lower().replace(" ", "-") if i.get("rarity") else None
+    lines = [_frontmatter({
+        "name": i.get("name", "Unknown"),
+        "type": "magic-item",
+        "rarity": i.get("rarity") or None,
+        "item_type": i.get("item_type") or None,
+        "attunement": True if i.get("requires_attunement") else None,
+        "tags": ["magic-item", rarity_tag] if rarity_tag else ["magic-item"],
+    })]
     lines.append("")
     
     # Title
@@ -326,21 +335,15 @@ def magic_item_to_obsidian(item: MagicItem | dict) -> str:
 
 def random_table_to_obsidian(table: RandomTable | dict) -> str:
     """Convert a random table to Obsidian markdown."""
-    if isinstance(table, dict):
-        t = table
-    else:
-        t = table.model_dump() if hasattr(table, 'model_dump') else table.__dict__
+    t = _as_dict(table)
 
-    lines = ["---"]
-    
     # YAML frontmatter
-    lines.append(f"name: \"{t.get('name', 'Random Table')}\"")
-    lines.append("type: random-table")
-    lines.append(f"die: {t.get('die', 'd20')}")
-    lines.append("tags:")
-    lines.append("  - random-table")
-    
-    lines.append("---")
+    lines = [_frontmatter({
+        "name": t.get("name", "Random Table"),
+        "type": "random-table",
+        "die": t.get("die", "d20"),
+        "tags": ["random-table"],
+    })]
     lines.append("")
     
     # Title
@@ -373,28 +376,18 @@ def random_table_to_obsidian(table: RandomTable | dict) -> str:
 
 def npc_to_obsidian(npc: NPC | dict) -> str:
     """Convert an NPC to Obsidian markdown."""
-    if isinstance(npc, dict):
-        n = npc
-    else:
-        n = npc.model_dump() if hasattr(npc, 'model_dump') else npc.__dict__
+    n = _as_dict(npc)
 
-    lines = ["---"]
-    
     # YAML frontmatter
-    lines.append(f"name: \"{n.get('name', 'Unknown')}\"")
-    lines.append("type: npc")
-    if n.get("role"):
-        lines.append(f"role: {n.get('role')}")
-    if n.get("race"):
-        lines.append(f"race: {n.get('race')}")
-    if n.get("location"):
-        lines.append(f"location: \"[[{n.get('location')}]]\"")
-    lines.append("tags:")
-    lines.append("  - npc")
-    if n.get("role"):
-        lines.append(f"  - {n.get('role').lower().replace(' ', '-')}")
-    
-    lines.append("---")
+    role_tag = n["role"].lower().replace(" ", "-") if n.get("role") else None
+    lines = [_frontmatter({
+        "name": n.get("name", "Unknown"),
+        "type": "npc",
+        "role": n.get("role") or None,
+        "race": n.get("race") or None,
+        "location": f"[[{n['location']}]]" if n.get("location") else None,
+        "tags": ["npc", role_tag] if role_tag else ["npc"],
+    })]
     lines.append("")
     
     # Title
@@ -444,23 +437,16 @@ def npc_to_obsidian(npc: NPC | dict) -> str:
 
 def location_to_obsidian(location: Location | dict) -> str:
     """Convert a location to Obsidian markdown."""
-    if isinstance(location, dict):
-        loc = location
-    else:
-        loc = location.model_dump() if hasattr(location, 'model_dump') else location.__dict__
+    loc = _as_dict(location)
 
-    lines = ["---"]
-    
     # YAML frontmatter
     name = loc.get("name") or f"Room {loc.get('number', '?')}"
-    lines.append(f"name: \"{name}\"")
-    lines.append("type: location")
-    if loc.get("number"):
-        lines.append(f"room_number: \"{loc.get('number')}\"")
-    lines.append("tags:")
-    lines.append("  - location")
-    
-    lines.append("---")
+    lines = [_frontmatter({
+        "name": name,
+        "type": "location",
+        "room_number": str(loc["number"]) if loc.get("number") else None,
+        "tags": ["location"],
+    })]
     lines.append("")
     
     # Title
@@ -506,6 +492,22 @@ def location_to_obsidian(location: Location | dict) -> str:
     return "\n".join(lines)
 
 
+# Renderers by name so work items stay picklable for the process pool
+_RENDERERS = {
+    "monster": monster_to_obsidian,
+    "spell": spell_to_obsidian,
+    "magic_item": magic_item_to_obsidian,
+    "random_table": random_table_to_obsidian,
+    "npc": npc_to_obsidian,
+    "location": location_to_obsidian,
+}
+
+def _render_one(job: tuple[str, dict]) -> str:
+    """Render a single (renderer_name, entity_dict) job."""
+    renderer_name, entity = job
+    return _RENDERERS[renderer_name](entity)
+
+
 def export_to_obsidian_vault(
     monsters: list = None,
     spells: list = None,
@@ -517,47 +519,43 @@ def export_to_obsidian_vault(
     """
     Export content to Obsidian markdown files.
     
+    Rendering is CPU-bound, so async callers should run this off the
+    event loop (e.g. with asyncio.to_thread).
+    
     Returns a dict mapping filename to markdown content.
     """
-    files = {}
-
-    if monsters:
-        for m in monsters:
-            name = m.get("name", "Unknown") if isinstance(m, dict) else m.name
-            filename = f"Monsters/{_sanitize_filename(name)}.md"
-            files[filename] = monster_to_obsidian(m)
-
-    if spells:
-        for s in spells:
-            name = s.get("name", "Unknown") if isinstance(s, dict) else s.name
-            filename = f"Spells/{_sanitize_filename(name)}.md"
-            files[filename] = spell_to_obsidian(s)
-
-    if items:
-        for i in items:
-            name = i.get("name", "Unknown") if isinstance(i, dict) else i.name
-            filename = f"Items/{_sanitize_filename(name)}.md"
-            files[filename] = magic_item_to_obsidian(i)
-
-    if tables:
-        for t in tables:
-            name = t.get("name", "Random Table") if isinstance(t, dict) else t.name
-            filename = f"Tables/{_sanitize_filename(name)}.md"
-            files[filename] = random_table_to_obsidian(t)
-
-    if npcs:
-        for n in npcs:
-            name = n.get("name", "Unknown") if isinstance(n, dict) else n.name
-            filename = f"NPCs/{_sanitize_filename(name)}.md"
-            files[filename] = npc_to_obsidian(n)
-
-    if locations:
-        for loc in locations:
-            name = loc.get("name") or f"Room {loc.get('number', '?')}" if isinstance(loc, dict) else loc.name
-            filename = f"Locations/{_sanitize_filename(name)}.md"
-            files[filename] = location_to_obsidian(loc)
-
-    return files
+    filenames: list[str] = []
+    jobs: list[tuple[str, dict]] = []
+
+    def add(renderer_name: str, directory: str, entity: Any, name: str) -> None:
+        filenames.append(f"{directory}/{_sanitize_filename(name)}.md")
+        jobs.append((renderer_name, _as_dict(entity)))
+
+    for m in monsters or []:
+        name = m.get("name", "Unknown") if isinstance(m, dict) else m.name
+        add("monster", "Monsters", m, name)
+
+    for s in spells or []:
+        name = s.get("name", "Unknown") if isinstance(s, dict) else s.name
+        add("spell", "Spells", s, name)
+
+    for i in items or []:
+        name = i.get("name", "Unknown") if isinstance(i, dict) else i.name
+        add("magic_item", "Items", i, name)
+
+    for t in tables or []:
+        name = t.get("name", "Random Table") if isinstance(t, dict) else t.name
+        add("random_table", "Tables", t, name)
+
+    for n in npcs or []:
+        name = n.get("name", "Unknown") if isinstance(n, dict) else n.name
+        add("npc", "NPCs", n, name)
+
+    for loc in locations or []:
+        name = loc.get("name") or f"Room {loc.get('number', '?')}" if isinstance(loc, dict) else loc.name
+        add("location", "Locations", loc, name)
+
+    return dict(zip(filenames, map(_render_one, jobs)))
 
 
 def _sanitize_filename(name: str) -> str:
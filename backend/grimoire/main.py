@@ -38,8 +38,45 @@ async def lifespan(app: FastAPI):
     from grimoire.database import get_db_session
     await start_queue_processor(get_db_session)
 
+    # Sweep expired response cache entries in the background
+    from grimoire.middleware.cache import run_cache_evictor
+    evict_task = asyncio.create_task(run_cache_evictor(interval=30.0))
+
+    # Drop idle rate limit buckets in the background
+    from grimoire.middleware.rate_limit import run_rate_limit_sweeper
+    sweeper_task = asyncio.create_task(run_rate_limit_sweeper(interval=60.0))
+
+    # Prune stale AI responses in the background
+    from grimoire.processors.ai_cache import run_ai_cache_pruner
+    ai_cache_task = asyncio.create_task(run_ai_cache_pruner(interval=3600.0))
+
     yield
 
+    # Stop AI cache pruner
+    ai_cache_task.cancel()
+    try:
+        await ai_cache_task
+    except asyncio.CancelledError:
+        pass
+
+    # Stop rate limit sweeper
+    sweeper_task.cancel()
+    try:
+        await sweeper_task
+    except asyncio.CancelledError:
+        pass
+    
+    from grimoire.middleware.rate_limit import redis_rate_limiter
+    if redis_rate_limiter is not None:
+        await redis_rate_limiter.close()
+
+    # Stop cache evictor
+    evict_task.cancel()
+    try:
+        await evict_task
+    except asyncio.CancelledError:
+        pass
+
     # Stop contribution queue processor
     stop_queue_processor()
 
@@ -51,6 +88,14 @@ async def lifespan(app: FastAPI):
     except asyncio.CancelledError:
         pass
     
+    # Close pooled AI provider connections
+    from grimoire.processors.ai_identifier import close_ai_clients
+    await close_ai_clients()
+
+    # Stop the page-processing worker processes
+    from grimoire.processors.parallel import shutdown_process_pool
+    await asyncio.to_thread(shutdown_process_pool)
+    
     # Watcher disabled
     # await stop_watcher()
 
@@ -1,10 +1,15 @@
 """Response caching middleware for frequently accessed endpoints."""
 
+import asyncio
+import gzip
 import hashlib
 import json
 import time
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Callable
+from urllib.parse import urlencode
 
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -21,58 +26,110 @@ class CacheEntry:
     status_code: int
     created_at: float
     ttl: int
+    path: str = ""
+    group: str = ""  # Matched CACHEABLE_PATHS prefix, used for per-endpoint quotas
+    encoding: str = ""  # "gzip" when content is stored compressed
+    etag: str = ""
+    content_length: int = field(init=False)
+    
+    def __post_init__(self) -> None:
+        self.content_length = len(self.content)
     
     def is_expired(self) -> bool:
         return time.time() > self.created_at + self.ttl
 
 
 class ResponseCache:
-    """In-memory response cache with TTL support."""
+    """In-memory LRU response cache with TTL support."""
     
-    def __init__(self, max_size: int = 1000):
-        self.cache: dict[str, CacheEntry] = {}
+    def __init__(self, max_size: int = 1000, per_path_max: int = 50):
+        self.cache: OrderedDict[str, CacheEntry] = OrderedDict()
         self.max_size = max_size
+        self.per_path_max = per_path_max
+        # Request path -> cache keys, since keys are hashes and can't be matched directly
+        self._by_path: defaultdict[str, set[str]] = defaultdict(set)
+        # Endpoint group -> cache keys in LRU order, so one endpoint's query
+        # variants can't crowd out everything else
+        self._by_group: defaultdict[str, OrderedDict[str, None]] = defaultdict(OrderedDict)
     
     def get(self, key: str) -> CacheEntry | None:
         entry = self.cache.get(key)
         if entry is None:
             return None
         if entry.is_expired():
-            del self.cache[key]
+            self._remove(key)
             return None
+        self.cache.move_to_end(key)
+        self._by_group[entry.group].move_to_end(key)
         return entry
     
     def set(self, key: str, entry: CacheEntry) -> None:
-        # Evict old entries if cache is full
-        if len(self.cache) >= self.max_size:
-            self._evict_expired()
-        if len(self.cache) >= self.max_size:
-            # Remove oldest entry
-            oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k].created_at)
-            del self.cache[oldest_key]
+        if key in self.cache:
+            self._remove(key)
+        else:
+            group_keys = self._by_group.get(entry.group)
+            if group_keys is not None and len(group_keys) >= self.per_path_max:
+                # Remove this endpoint's least recently used variant
+                self._remove(next(iter(group_keys)))
+            if len(self.cache) >= self.max_size:
+                # Remove least recently used entry
+                self._remove(next(iter(self.cache)))
         self.cache[key] = entry
+        self._by_path[entry.path].add(key)
+        self._by_group[entry.group][key] = None
     
     def invalidate(self, pattern: str | None = None) -> int:
         """Invalidate cache entries matching pattern or all if None."""
         if pattern is None:
             count = len(self.cache)
             self.cache.clear()
+            self._by_path.clear()
+            self._by_group.clear()
             return count
         
-        keys_to_delete = [k for k in self.cache if pattern in k]
-        for key in keys_to_delete:
-            del self.cache[key]
-        return len(keys_to_delete)
+        matching_paths = [path for path in self._by_path if pattern in path]
+        count = 0
+        for path in matching_paths:
+            for key in list(self._by_path.get(path, ())):
+                if key in self.cache:
+                    self._remove(key)
+                    count += 1
+        return count
+    
+    def _remove(self, key: str) -> None:
+        entry = self.cache.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_path.get(entry.path)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_path[entry.path]
+        group_keys = self._by_group.get(entry.group)
+        if group_keys is not None:
+            group_keys.pop(key, None)
+            if not group_keys:
+                del self._by_group[entry.group]
     
     def _evict_expired(self) -> None:
-        now = time.time()
         expired = [k for k, v in self.cache.items() if v.is_expired()]
         for key in expired:
-            del self.cache[key]
+            self._remove(key)
 
 
 # Global cache instance
-response_cache = ResponseCache()
+response_cache = ResponseCache(per_path_max=settings.cache_max_variants_per_path)
+
+
+async def run_cache_evictor(interval: float = 30.0) -> None:
+    """Periodically drop expired entries so set() never has to scan the cache."""
+    while True:
+        await asyncio.sleep(interval)
+        response_cache._evict_expired()
+
+
+# Bodies smaller than this aren't worth compressing
+GZIP_MIN_BYTES = 1024
 
 
 # Paths that should be cached with their TTL in seconds
@@ -94,42 +151,100 @@ NEVER_CACHE_PATHS = frozenset([
 def get_cache_key(request: Request) -> str:
     """Generate a cache key from the request."""
     path = request.url.path
-    query = str(sorted(request.query_params.items()))
-    key_data = f"{request.method}:{path}:{query}"
+    if not request.query_params:
+        key_data = f"{request.method}:{path}"
+    else:
+        # Re-encode so "&" or "=" inside values can't make distinct queries collide
+        query = urlencode(sorted(request.query_params.multi_items()))
+        key_data = f"{request.method}:{path}:{query}"
     return hashlib.md5(key_data.encode()).hexdigest()
 
 
-def should_cache(request: Request) -> tuple[bool, int]:
-    """Check if request should be cached and return TTL."""
-    if request.method != "GET":
-        return False, 0
-    
-    path = request.url.path
-    
-    # Check never cache paths
-    for never_cache in NEVER_CACHE_PATHS:
-        if path.startswith(never_cache):
-            return False, 0
+# Longest prefixes first so the most specific TTL wins
+_NEVER_CACHE_PREFIXES = tuple(NEVER_CACHE_PATHS)
+_CACHEABLE_PREFIXES = tuple(sorted(CACHEABLE_PATHS.items(), key=lambda kv: -len(kv[0])))
+
+
+@lru_cache(maxsize=4096)
+def _path_cache_rule(path: str) -> tuple[str, int]:
+    """Return the matched cacheable prefix and its TTL, or ("", 0) if not cacheable."""
+    if path.startswith(_NEVER_CACHE_PREFIXES):
+        return "", 0
     
     # Check exact matches first
-    if path in CACHEABLE_PATHS:
-        return True, CACHEABLE_PATHS[path]
+    ttl = CACHEABLE_PATHS.get(path)
+    if ttl is not None:
+        return path, ttl
     
     # Check prefix matches
-    for cacheable_path, ttl in CACHEABLE_PATHS.items():
+    for cacheable_path, ttl in _CACHEABLE_PREFIXES:
         if path.startswith(cacheable_path):
-            return True, ttl
+            return cacheable_path, ttl
     
-    return False, 0
+    return "", 0
+
+
+def make_etag(body: bytes) -> str:
+    """Build a strong ETag from the uncompressed response body."""
+    return f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the request's If-None-Match header covers the ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag
+        for tag in if_none_match.split(",")
+    )
+
+
+def accepts_gzip(request: Request) -> bool:
+    """Check whether the request's Accept-Encoding allows gzip (q=0 means refused)."""
+    wildcard = False
+    for item in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "x-gzip", "*"):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding == "*":
+            wildcard = q > 0
+        else:
+            return q > 0
+    return wildcard
+
+
+def cache_rule(request: Request) -> tuple[str, int]:
+    """Return the cacheable prefix matched by the request and its TTL."""
+    if request.method != "GET":
+        return "", 0
+    return _path_cache_rule(request.url.path)
+
+
+def should_cache(request: Request) -> tuple[bool, int]:
+    """Check if request should be cached and return TTL."""
+    _, ttl = cache_rule(request)
+    return ttl > 0, ttl
 
 
 class CacheMiddleware(BaseHTTPMiddleware):
     """Middleware that caches GET responses for configured endpoints."""
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        cacheable, ttl = should_cache(request)
+        group, ttl = cache_rule(request)
         
-        if not cacheable:
+        if ttl <= 0:
             return await call_next(request)
         
         cache_key = get_cache_key(request)
@@ -137,32 +252,75 @@ class CacheMiddleware(BaseHTTPMiddleware):
         # Check cache
         cached = response_cache.get(cache_key)
         if cached:
-            response = Response(
-                content=cached.content,
-                status_code=cached.status_code,
-                media_type=cached.content_type,
-            )
-            response.headers["X-Cache"] = "HIT"
-            response.headers["Cache-Control"] = f"max-age={ttl}"
-            return response
+            if cached.etag and etag_matches(request, cached.etag):
+                headers = {"ETag": cached.etag, "Cache-Control": f"max-age={ttl}"}
+                if cached.encoding == "gzip":
+                    # Must match the 200 so shared caches keep keying on encoding
+                    headers["Vary"] = "Accept-Encoding"
+                return Response(status_code=304, headers=headers)
+            
+            content = cached.content
+            content_length = cached.content_length
+            # Preset Content-Length/Content-Type so Starlette doesn't recompute them
+            headers = {
+                "content-type": cached.content_type,
+                "X-Cache": "HIT",
+                "Cache-Control": f"max-age={ttl}",
+            }
+            if cached.etag:
+                headers["ETag"] = cached.etag
+            if cached.encoding == "gzip":
+                headers["Vary"] = "Accept-Encoding"
+                if accepts_gzip(request):
+                    headers["Content-Encoding"] = "gzip"
+                else:
+                    content = gzip.decompress(content)
+                    content_length = len(content)
+            headers["content-length"] = str(content_length)
+            return Response(content=content, status_code=cached.status_code, headers=headers)
         
         # Get fresh response
         response = await call_next(request)
         
         # Only cache successful responses
         if response.status_code == 200:
+            # Large responses would evict many small hot entries; pass them through
+            content_length = response.headers.get("content-length")
+            if content_length is not None and int(content_length) > settings.cache_max_entry_bytes:
+                return response
+            
             # Read response body
-            body = b""
+            chunks = []
             async for chunk in response.body_iterator:
-                body += chunk
+                chunks.append(chunk)
+            body = b"".join(chunks)
+            
+            if len(body) > settings.cache_max_entry_bytes:
+                return Response(
+                    content=body,
+                    status_code=response.status_code,
+                    headers=dict(response.headers),
+                    media_type=response.media_type,
+                )
+            
+            # Store compressed so hits can be served to gzip clients as-is
+            encoding = ""
+            stored = body
+            if len(body) >= GZIP_MIN_BYTES and "content-encoding" not in response.headers:
+                stored = gzip.compress(body, compresslevel=1)
+                encoding = "gzip"
             
             # Store in cache
             entry = CacheEntry(
-                content=body,
+                content=stored,
                 content_type=response.media_type or "application/json",
                 status_code=response.status_code,
                 created_at=time.time(),
                 ttl=ttl,
+                path=request.url.path,
+                group=group,
+                encoding=encoding,
+                etag=make_etag(body),
             )
             response_cache.set(cache_key, entry)
             
@@ -172,6 +330,7 @@ class CacheMiddleware(BaseHTTPMiddleware):
                 status_code=response.status_code,
                 media_type=response.media_type,
             )
+            new_response.headers["ETag"] = entry.etag
             new_response.headers["X-Cache"] = "MISS"
             new_response.headers["Cache-Control"] = f"max-age={ttl}"
             return new_response
@@ -1,8 +1,11 @@
 """Rate limiting middleware for API endpoints."""
 
+import asyncio
+import re
+import sys
 import time
-from collections import defaultdict
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Callable
 
 from fastapi import Request, Response
@@ -11,59 +14,221 @@ from starlette.responses import JSONResponse
 
 from grimoire.config import settings
 
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+_NS_PER_SECOND = 1_000_000_000
+
 
 @dataclass
-class RateLimitBucket:
-    """Token bucket for rate limiting."""
-    requests: list[float] = field(default_factory=list)
-    
-    def is_allowed(self, max_requests: int, window_seconds: int) -> bool:
-        """Check if request is allowed and record it."""
-        now = time.time()
-        cutoff = now - window_seconds
-        
-        # Remove old requests outside the window
-        self.requests = [t for t in self.requests if t > cutoff]
-        
-        if len(self.requests) >= max_requests:
-            return False
+class TokenBucket:
+    """Token bucket for rate limiting with lazy refill.
+    
+    Holds at most max_requests tokens and refills at
+    max_requests / window_seconds tokens per second, computed on access.
+    
+    Time is monotonic_ns and the balance is kept in integer credit, where
+    one token is window_ns credit and each elapsed nanosecond adds
+    max_requests credit, so refills are exact and immune to clock steps.
+    """
+    credit: int | None = None  # Starts full on first refill
+    last_refill: int = 0  # time.monotonic_ns()
+    
+    def _refill(self, max_requests: int, window_ns: int) -> None:
+        """Add credit for the time elapsed since the last refill."""
+        now = time.monotonic_ns()
+        capacity = max_requests * window_ns
+        if self.credit is None:
+            self.credit = capacity
+        else:
+            self.credit = min(capacity, self.credit + (now - self.last_refill) * max_requests)
+        self.last_refill = now
+    
+    def is_allowed(self, max_requests: int, window_seconds: int) -> tuple[bool, float, int]:
+        """
+        Take a token if one is available.
         
-        self.requests.append(now)
-        return True
+        Returns:
+            Tuple of (is_allowed, seconds_until_next_token, remaining)
+        """
+        window_ns = window_seconds * _NS_PER_SECOND
+        self._refill(max_requests, window_ns)
+        if self.credit >= window_ns:
+            self.credit -= window_ns
+            return True, 0.0, self.credit // window_ns
+        wait_ns = -(-(window_ns - self.credit) // max_requests)
+        return False, wait_ns / _NS_PER_SECOND, 0
+
+
+# Bucket key: (client_ip, interned path segment)
+BucketKey = tuple[str, str]
+
+
+class BoundedBucketMap:
+    """LRU-ordered bucket store with a hard size cap.
+    
+    Keeps memory bounded even when a client cycles through spoofed
+    X-Forwarded-For addresses; the least recently used bucket is dropped
+    once the cap is reached.
+    """
+    
+    def __init__(self, max_size: int):
+        self._buckets: OrderedDict[BucketKey, TokenBucket] = OrderedDict()
+        self.max_size = max_size
     
-    def time_until_reset(self, window_seconds: int) -> float:
-        """Get seconds until oldest request expires."""
-        if not self.requests:
-            return 0
-        return max(0, self.requests[0] + window_seconds - time.time())
+    def get_or_create(self, key: BucketKey) -> TokenBucket:
+        """Get the bucket for a key, creating it and evicting the LRU bucket if full."""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            self._buckets.move_to_end(key)
+            return bucket
+        if len(self._buckets) >= self.max_size:
+            self._buckets.popitem(last=False)
+        bucket = self._buckets[key] = TokenBucket()
+        return bucket
+    
+    def items(self):
+        return self._buckets.items()
+    
+    def __delitem__(self, key: BucketKey) -> None:
+        del self._buckets[key]
+    
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# Number of bucket shards; must be a power of two
+_SHARD_COUNT = 16
 
 
 class RateLimiter:
-    """In-memory rate limiter using sliding window."""
+    """In-memory rate limiter using token buckets.
+    
+    Buckets are spread over several small dicts so no single dict grows
+    huge and pays for large rehashes. Bucket access never awaits, so the
+    event loop already serializes it and the shards don't need locks.
+    """
     
-    def __init__(self):
-        self.buckets: dict[str, RateLimitBucket] = defaultdict(RateLimitBucket)
+    def __init__(self, max_buckets: int = 100_000):
+        shard_size = max(1, max_buckets // _SHARD_COUNT)
+        self.shards: list[BoundedBucketMap] = [
+            BoundedBucketMap(shard_size) for _ in range(_SHARD_COUNT)
+        ]
+    
+    def get_bucket(self, key: BucketKey) -> TokenBucket:
+        """Get the bucket for a key, creating it on first use."""
+        return self.shards[hash(key) & (_SHARD_COUNT - 1)].get_or_create(key)
     
     def is_allowed(
         self, 
-        key: str, 
+        key: BucketKey, 
         max_requests: int, 
         window_seconds: int
-    ) -> tuple[bool, float]:
+    ) -> tuple[bool, float, int]:
         """
         Check if request is allowed.
         
         Returns:
-            Tuple of (is_allowed, seconds_until_reset)
+            Tuple of (is_allowed, seconds_until_reset, remaining)
         """
-        bucket = self.buckets[key]
-        allowed = bucket.is_allowed(max_requests, window_seconds)
-        reset_time = bucket.time_until_reset(window_seconds)
-        return allowed, reset_time
+        # Same get-or-create as get_bucket, inlined on the per-request path
+        shard = self.shards[hash(key) & (_SHARD_COUNT - 1)]
+        return shard.get_or_create(key).is_allowed(max_requests, window_seconds)
+    
+    def sweep(self, max_idle_seconds: float) -> int:
+        """Drop buckets untouched for max_idle_seconds; return how many were removed."""
+        cutoff = time.monotonic_ns() - int(max_idle_seconds * _NS_PER_SECOND)
+        removed = 0
+        for shard in self.shards:
+            idle = [key for key, bucket in shard.items() if bucket.last_refill < cutoff]
+            for key in idle:
+                del shard[key]
+            removed += len(idle)
+        return removed
 
 
-# Global rate limiter instance
-rate_limiter = RateLimiter()
+# Token bucket in Lua so refill + take is one atomic round-trip shared by all
+# workers. Uses the Redis clock so workers agree on elapsed time.
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local rate = capacity / window
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(window * 2))
+return {allowed, tostring(wait), math.floor(tokens)}
+"""
+
+
+class RedisRateLimiter:
+    """Rate limiter backed by Redis, shared across all Uvicorn workers.
+    
+    The in-process RateLimiter keeps state per process, so running N
+    workers multiplies the effective limit by N.
+    """
+    
+    def __init__(self, url: str):
+        self.client = aioredis.from_url(url)
+        self._script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+    
+    async def is_allowed(
+        self,
+        key: BucketKey,
+        max_requests: int,
+        window_seconds: int
+    ) -> tuple[bool, float, int]:
+        """
+        Check if request is allowed.
+        
+        Returns:
+            Tuple of (is_allowed, seconds_until_reset, remaining)
+        """
+        allowed, wait, remaining = await self._script(
+            keys=[f"grimoire:ratelimit:{key[0]}:{key[1]}"],
+            args=[max_requests, window_seconds],
+        )
+        return bool(allowed), float(wait), int(remaining)
+    
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+# Global rate limiter instances; Redis is used when configured
+rate_limiter = RateLimiter(max_buckets=settings.rate_limit_max_buckets)
+redis_rate_limiter: RedisRateLimiter | None = None
+if settings.rate_limit_redis_url:
+    if not REDIS_AVAILABLE:
+        raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed")
+    redis_rate_limiter = RedisRateLimiter(settings.rate_limit_redis_url)
+
+
+async def run_rate_limit_sweeper(interval: float = 60.0) -> None:
+    """Periodically evict idle buckets so the limiter's memory stays bounded.
+    
+    A bucket idle for two full windows has refilled completely, so dropping
+    it is indistinguishable from keeping it.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        max_window = max(settings.rate_limit_window, settings.ai_rate_limit_window)
+        rate_limiter.sweep(2 * max_window)
 
 
 # Paths that should use stricter AI rate limits
@@ -73,12 +238,48 @@ AI_PATHS = frozenset([
     "/api/v1/semantic/",
 ])
 
+# Single anchored alternation so the AI check is one C-level match
+_AI_PATH_RE = re.compile("|".join(re.escape(p) for p in sorted(AI_PATHS)))
+
+
+# Methods and paths that never consume a token: CORS preflight, HEAD
+# probes and health checks
+_FREE_METHODS = frozenset(["OPTIONS", "HEAD"])
+_FREE_PATHS = frozenset([
+    "/api/v1/health",
+    "/api/v1/health/ready",
+])
+
+
+# Known route segments, interned so bucket keys share one string per
+# segment; any other segment is counted against the generic "api" bucket
+_SEGMENTS = {
+    s: sys.intern(s)
+    for s in (
+        "api", "products", "collections", "tags", "folders", "search",
+        "settings", "bulk", "ai", "contributions", "queue", "extraction",
+        "semantic", "structured", "export", "campaigns", "duplicates",
+        "exclusions", "library", "run-notes",
+    )
+}
+
+
+def get_path_segment(path: str) -> str:
+    """Get the third path segment (e.g. "tags" in /api/v1/tags/5) without splitting."""
+    first = path.find("/", 1)
+    second = path.find("/", first + 1) if first != -1 else -1
+    if second == -1:
+        return "api"
+    end = path.find("/", second + 1)
+    return path[second + 1:end] if end != -1 else path[second + 1:]
+
 
 def get_client_ip(request: Request) -> str:
     """Get client IP address from request."""
     forwarded = request.headers.get("X-Forwarded-For")
     if forwarded:
-        return forwarded.split(",")[0].strip()
+        # Only the first (client) address matters; don't split the whole chain
+        return forwarded.partition(",")[0].strip()
     return request.client.host if request.client else "unknown"
 
 
@@ -96,9 +297,11 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         if not path.startswith("/api/"):
             return await call_next(request)
         
+        if request.method in _FREE_METHODS or path in _FREE_PATHS:
+            return await call_next(request)
+        
         # Determine rate limit based on path
-        is_ai_path = any(path.startswith(p) for p in AI_PATHS)
-        if is_ai_path:
+        if _AI_PATH_RE.match(path) is not None:
             max_requests = settings.ai_rate_limit_requests
             window = settings.ai_rate_limit_window
         else:
@@ -107,10 +310,17 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         
         # Get client identifier
         client_ip = get_client_ip(request)
-        key = f"{client_ip}:{path.split('/')[3] if len(path.split('/')) > 3 else 'api'}"
+        key = (client_ip, _SEGMENTS.get(get_path_segment(path), "api"))
         
         # Check rate limit
-        allowed, reset_time = rate_limiter.is_allowed(key, max_requests, window)
+        if redis_rate_limiter is not None:
+            allowed, reset_time, remaining = await redis_rate_limiter.is_allowed(
+                key, max_requests, window
+            )
+        else:
+            allowed, reset_time, remaining = rate_limiter.is_allowed(
+                key, max_requests, window
+            )
         
         if not allowed:
             return JSONResponse(
@@ -130,8 +340,6 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         # Process request and add rate limit headers
         response = await call_next(request)
         response.headers["X-RateLimit-Limit"] = str(max_requests)
-        response.headers["X-RateLimit-Remaining"] = str(
-            max(0, max_requests - len(rate_limiter.buckets[key].requests))
-        )
+        response.headers["X-RateLimit-Remaining"] = str(remaining)
         
         return response
@@ -38,18 +38,25 @@ MIGRATIONS = [
 ]
 
 
-async def column_exists(conn, table: str, column: str) -> bool:
-    """Check if a column exists in a table."""
-    result = await conn.execute(text(f"PRAGMA table_info({table})"))
-    columns = [row[1] for row in result.fetchall()]
-    return column in columns
+async def existing_columns(conn, table: str) -> set[str]:
+    """Get the names of all columns in a table."""
+    result = await conn.execute(
+        text("SELECT name FROM pragma_table_info(:table)"),
+        {"table": table}
+    )
+    return set(result.scalars())
 
 
 async def run_migrations():
     """Run all pending migrations."""
     async with engine.begin() as conn:
+        # Read each table's columns once rather than once per migration
+        columns = {}
+        for table in {table for table, _, _ in MIGRATIONS}:
+            columns[table] = await existing_columns(conn, table)
+        
         for table, column, sql in MIGRATIONS:
-            if await column_exists(conn, table, column):
+            if column in columns[table]:
                 logger.info(f"Column {table}.{column} already exists, skipping")
                 continue
             
@@ -0,0 +1,41 @@
+"""
+Migration script to replace the product_embeddings product_id index with a
+unique composite (product_id, chunk_index) index.
+"""
+
+import asyncio
+import logging
+from sqlalchemy import text
+from grimoire.database import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def run_migrations():
+    """Run all pending migrations."""
+    async with engine.begin() as conn:
+        # Keep the oldest row of any duplicate chunks so the index can be unique
+        logger.info("Removing duplicate product_embeddings chunks")
+        await conn.execute(text(
+            "DELETE FROM product_embeddings WHERE id NOT IN ("
+            "SELECT MIN(id) FROM product_embeddings GROUP BY product_id, chunk_index)"
+        ))
+
+        # Replace any non-unique index an earlier run of this script created
+        logger.info("Creating unique index ix_pe_product_chunk")
+        await conn.execute(text("DROP INDEX IF EXISTS ix_pe_product_chunk"))
+        await conn.execute(text(
+            "CREATE UNIQUE INDEX ix_pe_product_chunk "
+            "ON product_embeddings(product_id, chunk_index)"
+        ))
+
+        # The composite index covers every product_id lookup
+        logger.info("Dropping index ix_product_embeddings_product_id")
+        await conn.execute(text("DROP INDEX IF EXISTS ix_product_embeddings_product_id"))
+
+    logger.info("All migrations complete")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_migrations())
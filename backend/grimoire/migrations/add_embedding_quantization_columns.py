@@ -0,0 +1,81 @@
+"""
+Migration script to add int8 quantized embedding columns.
+Run this to add embedding_q/embedding_scale to an existing database and
+backfill them from the stored float32 vectors.
+"""
+
+import asyncio
+import logging
+
+import numpy as np
+from sqlalchemy import text
+from grimoire.database import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+MIGRATIONS = [
+    ("product_embeddings", "embedding_q", "ALTER TABLE product_embeddings ADD COLUMN embedding_q BLOB"),
+    ("product_embeddings", "embedding_scale", "ALTER TABLE product_embeddings ADD COLUMN embedding_scale FLOAT"),
+]
+
+
+async def existing_columns(conn, table: str) -> set[str]:
+    """Get the names of all columns in a table."""
+    result = await conn.execute(
+        text("SELECT name FROM pragma_table_info(:table)"),
+        {"table": table}
+    )
+    return set(result.scalars())
+
+
+async def backfill_quantized(conn) -> int:
+    """Quantize every embedding that has no int8 copy yet."""
+    result = await conn.execute(
+        text("SELECT id, embedding FROM product_embeddings WHERE embedding_q IS NULL")
+    )
+    params = []
+    for row_id, blob in result:
+        v = np.frombuffer(blob, dtype=np.float32)
+        max_abs = float(np.abs(v).max()) if len(v) else 0.0
+        if max_abs > 0:
+            q = np.clip(np.round(v / max_abs * 127), -128, 127).astype(np.int8)
+        else:
+            q = np.zeros(len(v), dtype=np.int8)
+        params.append({"id": row_id, "q": q.tobytes(), "scale": max_abs / 127})
+
+    if params:
+        await conn.execute(
+            text("UPDATE product_embeddings SET embedding_q = :q, embedding_scale = :scale WHERE id = :id"),
+            params,
+        )
+    return len(params)
+
+
+async def run_migrations():
+    """Run all pending migrations."""
+    async with engine.begin() as conn:
+        columns = await existing_columns(conn, "product_embeddings")
+
+        for table, column, sql in MIGRATIONS:
+            if column in columns:
+                logger.info(f"Column {table}.{column} already exists, skipping")
+                continue
+
+            logger.info(f"Adding column {table}.{column}")
+            try:
+                await conn.execute(text(sql))
+                logger.info(f"Successfully added {table}.{column}")
+            except Exception as e:
+                logger.error(f"Failed to add {table}.{column}: {e}")
+                raise
+
+        count = await backfill_quantized(conn)
+        logger.info(f"Quantized {count} embeddings")
+
+    logger.info("All migrations complete")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_migrations())
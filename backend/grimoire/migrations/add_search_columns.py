@@ -18,9 +18,11 @@ logger = logging.getLogger(__name__)
 
 async def column_exists(conn, table: str, column: str) -> bool:
     """Check if a column exists in a table (SQLite)."""
-    result = await conn.execute(text(f"PRAGMA table_info({table})"))
-    columns = [row[1] for row in result.fetchall()]
-    return column in columns
+    result = await conn.execute(
+        text("SELECT 1 FROM pragma_table_info(:table) WHERE name = :column LIMIT 1"),
+        {"table": table, "column": column}
+    )
+    return result.fetchone() is not None
 
 
 async def table_exists(conn, table: str) -> bool:
@@ -77,13 +79,22 @@ async def run_migrations():
         except Exception as e:
             logger.info(f"Insert trigger may already exist: {e}")
         
-        # Update trigger
+        # Update trigger: one in-place UPDATE, fired only when indexed columns change.
+        # Replaces the older DELETE+INSERT trigger, which also discarded the
+        # extracted_text written by deep indexing on every product update.
         try:
+            await conn.execute(text("DROP TRIGGER IF EXISTS products_fts_update"))
             await conn.execute(text("""
-                CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE ON products BEGIN
-                    DELETE FROM products_fts WHERE rowid = old.id;
-                    INSERT INTO products_fts(rowid, title, file_name, publisher, game_system, product_type)
-                    VALUES (new.id, new.title, new.file_name, new.publisher, new.game_system, new.product_type);
+                CREATE TRIGGER products_fts_update
+                AFTER UPDATE OF title, file_name, publisher, game_system, product_type ON products
+                BEGIN
+                    UPDATE products_fts
+                    SET title = new.title,
+                        file_name = new.file_name,
+                        publisher = new.publisher,
+                        game_system = new.game_system,
+                        product_type = new.product_type
+                    WHERE rowid = old.id;
                 END
             """))
             logger.info("✓ Created update trigger")
@@ -109,27 +120,43 @@ async def run_migrations():
 
 async def rebuild_fts_index():
     """Rebuild FTS index from existing products."""
-    async with engine.begin() as conn:
-        logger.info("Rebuilding FTS index...")
-        
-        # Clear existing FTS data
+    async with engine.connect() as conn:
+        # One-shot bulk load: skip fsyncs and use a large page cache (~200 MB).
+        # Journal mode stays WAL, since leaving it needs exclusive access.
+        await conn.execute(text("PRAGMA synchronous=OFF"))
+        await conn.execute(text("PRAGMA cache_size=-200000"))
         try:
-            await conn.execute(text("DELETE FROM products_fts"))
-        except Exception as e:
-            logger.warning(f"Could not clear FTS table, may need to run migrations first: {e}")
-            return
-        
-        # Repopulate from products table
-        await conn.execute(text("""
-            INSERT INTO products_fts(rowid, title, file_name, publisher, game_system, product_type)
-            SELECT id, COALESCE(title, ''), COALESCE(file_name, ''), 
-                   COALESCE(publisher, ''), COALESCE(game_system, ''), COALESCE(product_type, '')
-            FROM products
-        """))
-        
-        result = await conn.execute(text("SELECT COUNT(*) FROM products_fts"))
-        count = result.scalar()
-        logger.info(f"✓ Indexed {count} products")
+            logger.info("Rebuilding FTS index...")
+            
+            # Clear existing FTS data
+            try:
+                await conn.execute(text("DELETE FROM products_fts"))
+            except Exception as e:
+                logger.warning(f"Could not clear FTS table, may need to run migrations first: {e}")
+                await conn.rollback()
+                return
+            
+            # Repopulate from products table
+            await conn.execute(text("""
+                INSERT INTO products_fts(rowid, title, file_name, publisher, game_system, product_type)
+                SELECT id, COALESCE(title, ''), COALESCE(file_name, ''), 
+                       COALESCE(publisher, ''), COALESCE(game_system, ''), COALESCE(product_type, '')
+                FROM products
+            """))
+            
+            # Merge the FTS5 b-tree segments written by the bulk insert
+            await conn.execute(text("INSERT INTO products_fts(products_fts) VALUES('optimize')"))
+            await conn.commit()
+            
+            result = await conn.execute(text("SELECT COUNT(*) FROM products_fts"))
+            count = result.scalar()
+            logger.info(f"✓ Indexed {count} products")
+        finally:
+            # Restore the defaults from grimoire.database before the connection is pooled again
+            await conn.rollback()
+            await conn.execute(text("PRAGMA synchronous=NORMAL"))
+            await conn.execute(text("PRAGMA cache_size=-2000"))
+            await conn.commit()
 
 
 if __name__ == "__main__":
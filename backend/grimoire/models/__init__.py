@@ -11,7 +11,7 @@ from grimoire.models.embedding import ProductEmbedding
 from grimoire.models.campaign import Campaign, Session
 from grimoire.models.run_note import RunNote
 from grimoire.models.exclusion import ExclusionRule, ExclusionRuleType, DEFAULT_EXCLUSION_RULES
-from grimoire.models.scan_job import ScanJob, ScanJobStatus
+from grimoire.models.scan_job import ScanJob, ScanJobProgress, ScanJobStatus
 from grimoire.models.deleted_duplicate import DeletedDuplicate
 
 __all__ = [
@@ -33,6 +33,7 @@ __all__ = [
     "ExclusionRuleType",
     "DEFAULT_EXCLUSION_RULES",
     "ScanJob",
+    "ScanJobProgress",
     "ScanJobStatus",
     "DeletedDuplicate",
 ]
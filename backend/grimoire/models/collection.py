@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING
 from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from grimoire.database import Base
+from grimoire.database import Base, safe_repr
 
 if TYPE_CHECKING:
     from grimoire.models.product import Product
@@ -37,7 +37,7 @@ class Collection(Base):
     )
 
     def __repr__(self) -> str:
-        return f"<Collection(id={self.id}, name='{self.name}')>"
+        return safe_repr(self, 'id', 'name')
 
 
 class CollectionProduct(Base):
@@ -63,4 +63,4 @@ class CollectionProduct(Base):
     product: Mapped["Product"] = relationship("Product", back_populates="collection_products")
 
     def __repr__(self) -> str:
-        return f"<CollectionProduct(collection_id={self.collection_id}, product_id={self.product_id})>"
+        return safe_repr(self, 'collection_id', 'product_id')
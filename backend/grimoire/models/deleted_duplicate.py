@@ -5,7 +5,7 @@ from datetime import datetime
 from sqlalchemy import DateTime, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
-from grimoire.database import Base
+from grimoire.database import Base, safe_repr
 
 
 class DeletedDuplicate(Base):
@@ -26,4 +26,4 @@ class DeletedDuplicate(Base):
     )
 
     def __repr__(self) -> str:
-        return f"<DeletedDuplicate {self.id}: {self.file_path}>"
+        return safe_repr(self, 'id', 'file_path')
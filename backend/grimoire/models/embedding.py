@@ -1,23 +1,46 @@
 """Embedding storage model for semantic search."""
 
-from datetime import datetime, UTC
+from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text, LargeBinary
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, LargeBinary, case, func, select
 from sqlalchemy.orm import relationship
 
 from grimoire.database import Base
 
+try:
+    import blosc
+    BLOSC_AVAILABLE = True
+except ImportError:
+    BLOSC_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Codec used for new embedding blobs; rows with no compression are raw bytes
+EMBEDDING_COMPRESSION = "zstd" if BLOSC_AVAILABLE else None
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Sequence
+
+    import numpy as np
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 
 class ProductEmbedding(Base):
     """Stores vector embeddings for product content chunks.
     
     Uses binary storage for embeddings (numpy bytes).
-    Search is performed in-memory using cosine similarity.
+    Search is performed in-memory using cosine similarity against the
+    matrix built by ``load_matrix``.
     """
 
     __tablename__ = "product_embeddings"
     __table_args__ = (
-        Index("ix_product_embeddings_product_id", "product_id"),
+        # Serves both per-product lookups and ordered chunk retrieval
+        Index("ix_pe_product_chunk", "product_id", "chunk_index", unique=True),
     )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -26,25 +49,235 @@ class ProductEmbedding(Base):
     chunk_index = Column(Integer, nullable=False)
     chunk_text = Column(Text, nullable=False)
     
-    # Binary storage for embeddings (stored as numpy bytes)
+    # Binary storage for embeddings (numpy bytes, Blosc-compressed when
+    # compression is set)
     embedding = Column(LargeBinary, nullable=False)
+    compression = Column(String(8), nullable=True, default=EMBEDDING_COMPRESSION)
+
+    # int8 copy of the embedding (a quarter of the bytes) used for search;
+    # the original vector is approximately embedding_q * embedding_scale
+    embedding_q = Column(LargeBinary, nullable=True)
+    embedding_scale = Column(Float, nullable=True)
     
     embedding_model = Column(String(100), nullable=False)
     embedding_dim = Column(Integer, nullable=False)
     
-    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+    created_at = Column(DateTime, server_default=func.now())
 
     product = relationship("Product", backref="embeddings")
 
-    def get_embedding_vector(self) -> list[float]:
-        """Deserialize embedding from bytes."""
+    @classmethod
+    async def load_matrix(
+        cls,
+        session: "AsyncSession",
+        *criteria,
+        dim: int | None = None,
+        quantized: bool = True,
+    ) -> tuple["np.ndarray", list[int]]:
+        """Bulk-load embeddings into one L2-normalized (N, dim) float32 matrix.
+
+        Rows are filtered by ``criteria`` and, when given, by ``dim`` so that
+        vectors from different models are never stacked together. Returns the
+        matrix and the embedding row ids in matching order, so cosine
+        similarity for every row is a single ``matrix @ query``.
+
+        With ``quantized`` the int8 copies are read instead of the float32
+        blobs wherever they exist, a quarter of the bytes off disk.
+        """
+        import numpy as np
+
+        if quantized:
+            query = select(
+                cls.id,
+                case((cls.embedding_q.is_(None), cls.embedding)).label("embedding"),
+                cls.compression,
+                cls.embedding_q,
+                cls.embedding_scale,
+                cls.embedding_dim,
+            ).where(*criteria)
+        else:
+            query = select(
+                cls.id, cls.embedding, cls.compression, cls.embedding_dim
+            ).where(*criteria)
+        if dim is not None:
+            query = query.where(cls.embedding_dim == dim)
+        rows = (await session.execute(query)).all()
+
+        if not rows:
+            return np.empty((0, dim or 0), dtype=np.float32), []
+
+        if dim is None:
+            dim = rows[0].embedding_dim
+            rows = [row for row in rows if row.embedding_dim == dim]
+
+        out = np.empty((len(rows), dim), dtype=np.float32)
+        ids = []
+        for i, row in enumerate(rows):
+            if quantized and row.embedding_q is not None:
+                np.multiply(
+                    np.frombuffer(row.embedding_q, dtype=np.int8),
+                    row.embedding_scale,
+                    out=out[i],
+                    casting="unsafe",
+                )
+            else:
+                out[i] = np.frombuffer(
+                    _decompress(row.embedding, row.compression), dtype=np.float32
+                )
+            ids.append(row.id)
+
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        out /= norms
+        return out, ids
+
+    def get_embedding_vector(self) -> "np.ndarray":
+        """Deserialize embedding from bytes as a read-only view.
+
+        Uncompressed blobs are viewed without a copy.
+        """
         import numpy as np
         if self.embedding is not None:
-            return np.frombuffer(self.embedding, dtype=np.float32).tolist()
-        return []
+            return np.frombuffer(
+                _decompress(self.embedding, self.compression), dtype=np.float32
+            )
+        return np.empty(0, dtype=np.float32)
+
+    get_embedding_array = get_embedding_vector
+
+    def set_embedding_vector(self, vector: "list[float] | np.ndarray"):
+        """Serialize embedding to bytes.
+
+        float32 ndarrays are written without an intermediate conversion.
+        """
+        import numpy as np
+        v = np.ascontiguousarray(vector, dtype=np.float32)
+        if EMBEDDING_COMPRESSION:
+            # Byte-shuffle groups the float32 exponent bytes before zstd
+            self.embedding = blosc.compress_ptr(
+                v.__array_interface__["data"][0],
+                v.size,
+                v.itemsize,
+                cname=EMBEDDING_COMPRESSION,
+                clevel=3,
+                shuffle=blosc.SHUFFLE,
+            )
+        else:
+            self.embedding = v.tobytes()
+        self.compression = EMBEDDING_COMPRESSION
+        self.embedding_dim = len(v)
 
-    def set_embedding_vector(self, vector: list[float]):
-        """Serialize embedding to bytes."""
+        max_abs = float(np.abs(v).max()) if len(v) else 0.0
+        if max_abs > 0:
+            q = np.clip(np.round(v / max_abs * 127), -128, 127).astype(np.int8)
+        else:
+            q = np.zeros(len(v), dtype=np.int8)
+        self.embedding_q = q.tobytes()
+        self.embedding_scale = max_abs / 127
+
+    def dequantize(self) -> list[float]:
+        """Reconstruct the vector from its int8 copy (for debugging)."""
         import numpy as np
-        self.embedding = np.array(vector, dtype=np.float32).tobytes()
-        self.embedding_dim = len(vector)
+        if self.embedding_q is None:
+            return []
+        q = np.frombuffer(self.embedding_q, dtype=np.int8)
+        return (q.astype(np.float32) * self.embedding_scale).tolist()
+
+
+def _decompress(blob: bytes, compression: str | None) -> bytes:
+    """Return the raw float32 bytes of a stored embedding blob."""
+    if not compression:
+        return blob
+    if not BLOSC_AVAILABLE:
+        raise RuntimeError(
+            f"Embedding is {compression}-compressed but the blosc package is not installed"
+        )
+    return blosc.decompress(blob)
+
+
+def stack_embeddings(rows: "Sequence[ProductEmbedding]") -> "np.ndarray":
+    """Copy the float32 vectors of same-dimension rows into one (N, dim) matrix."""
+    import numpy as np
+    if not rows:
+        return np.empty((0, 0), dtype=np.float32)
+    out = np.empty((len(rows), rows[0].embedding_dim), dtype=np.float32)
+    for i, row in enumerate(rows):
+        np.copyto(out[i], row.get_embedding_array())
+    return out
+
+
+async def iter_embedding_buffers(
+    session: "AsyncSession",
+    product_ids: list[int] | None = None,
+    chunksize: int = 10000,
+) -> "AsyncIterator[tuple[int, bytes]]":
+    """Stream (product_id, float32 bytes) pairs for stored embeddings.
+
+    Rows come from a streamed result fetched chunksize at a time, as plain
+    column tuples, so no ProductEmbedding instances are built and memory
+    stays bounded however many embeddings there are.
+    """
+    query = select(
+        ProductEmbedding.product_id,
+        ProductEmbedding.embedding,
+        ProductEmbedding.compression,
+    ).execution_options(yield_per=chunksize)
+    if product_ids is not None:
+        query = query.where(ProductEmbedding.product_id.in_(product_ids))
+
+    result = await session.stream(query)
+    async for product_id, blob, compression in result:
+        yield product_id, _decompress(blob, compression)
+
+
+async def embeddings_to_arrow(
+    session: "AsyncSession",
+    product_ids: list[int],
+) -> "pa.Table":
+    """Export the embeddings of the given products as an Arrow table.
+
+    Vectors are copied once into a contiguous (N, dim) float32 matrix and
+    wrapped, without another copy, as a FixedSizeListArray column alongside
+    product_id and chunk_index.
+    """
+    import numpy as np
+
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is not installed")
+
+    query = (
+        select(
+            ProductEmbedding.product_id,
+            ProductEmbedding.chunk_index,
+            ProductEmbedding.embedding,
+            ProductEmbedding.compression,
+            ProductEmbedding.embedding_dim,
+        )
+        .where(ProductEmbedding.product_id.in_(product_ids))
+        .order_by(ProductEmbedding.product_id, ProductEmbedding.chunk_index)
+    )
+    rows = (await session.execute(query)).all()
+
+    dims = {row.embedding_dim for row in rows}
+    if len(dims) > 1:
+        raise ValueError(f"Embeddings have mixed dimensions: {sorted(dims)}")
+    if not dims:
+        # No fixed size to declare without rows
+        return pa.table({
+            "product_id": pa.array([], type=pa.int64()),
+            "chunk_index": pa.array([], type=pa.int32()),
+            "embedding": pa.array([], type=pa.list_(pa.float32())),
+        })
+    dim = dims.pop()
+
+    out = np.empty((len(rows), dim), dtype=np.float32)
+    for i, row in enumerate(rows):
+        raw = _decompress(row.embedding, row.compression)
+        np.copyto(out[i], np.frombuffer(raw, dtype=np.float32))
+
+    flat = pa.array(out.ravel(), type=pa.float32())
+    return pa.table({
+        "product_id": pa.array([row.product_id for row in rows], type=pa.int64()),
+        "chunk_index": pa.array([row.chunk_index for row in rows], type=pa.int32()),
+        "embedding": pa.FixedSizeListArray.from_arrays(flat, dim),
+    })
@@ -1,12 +1,19 @@
 """Exclusion rules model for filtering files during scanning."""
 
+import fnmatch
+import functools
+import os
+import re
 from datetime import datetime
 from enum import Enum
 
 from sqlalchemy import Boolean, DateTime, Integer, String, Text, func
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, validates
 
-from grimoire.database import Base
+from grimoire.database import Base, safe_repr
+
+# Length limit for rule patterns, checked once on assignment
+MAX_PATTERN_LENGTH = 500
 
 
 class ExclusionRuleType(str, Enum):
@@ -27,7 +34,7 @@ class ExclusionRule(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     
     rule_type: Mapped[str] = mapped_column(String(20), nullable=False)
-    pattern: Mapped[str] = mapped_column(String(500), nullable=False)
+    pattern: Mapped[str] = mapped_column(Text, nullable=False)
     description: Mapped[str | None] = mapped_column(String(255), nullable=True)
     
     enabled: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -42,8 +49,19 @@ class ExclusionRule(Base):
         DateTime, nullable=False, server_default=func.now()
     )
 
+    @validates("pattern")
+    def _validate_pattern(self, key: str, value: str) -> str:
+        if value is not None and len(value) > MAX_PATTERN_LENGTH:
+            raise ValueError(f"pattern exceeds {MAX_PATTERN_LENGTH} characters")
+        return value
+
+    @property
+    def compiled(self) -> "CompiledRule":
+        """Pattern in its ready-to-match form; see _compile_rule."""
+        return _compile_rule(self.rule_type, self.pattern)
+
     def __repr__(self) -> str:
-        return f"<ExclusionRule(id={self.id}, type='{self.rule_type}', pattern='{self.pattern}')>"
+        return safe_repr(self, 'id', 'rule_type', 'pattern')
 
 
 # Default exclusion rules to be seeded on first run
@@ -68,3 +86,110 @@ DEFAULT_EXCLUSION_RULES = [
     # Size limits
     {"rule_type": "size_min", "pattern": "10240", "description": "Files under 10KB (likely corrupt)", "priority": 80},
 ]
+
+
+# Path separators as a regex class, matching what Path treats as separators
+_SEP_CHARS = re.escape(os.sep + (os.altsep or ""))
+_SEP = f"[{_SEP_CHARS}]"
+
+# fnmatch folds case wherever the OS does (Windows), so the regexes must too
+_FOLD_CASE = os.path.normcase("A") == "a"
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a filename glob to a regex that never crosses a path separator.
+
+    Follows fnmatch.translate, except * and ? stop at separators so the
+    pattern can be searched within a full path.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            out.append(f"[^{_SEP_CHARS}]*")
+        elif c == "?":
+            out.append(f"[^{_SEP_CHARS}]")
+        elif c == "[":
+            j = i
+            if j < n and pattern[j] == "!":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            j = pattern.find("]", j)
+            if j == -1:
+                out.append(r"\[")
+            else:
+                body = pattern[i:j].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                elif body.startswith("^"):
+                    body = "\\" + body
+                out.append(f"[{body}]")
+                i = j + 1
+        else:
+            out.append(re.escape(c))
+    return "".join(out)
+
+
+def rule_to_regex(rule_type: str, pattern: str) -> str | None:
+    """Regex equivalent of a path rule, for searching within a full path.
+
+    Covers folder_name (an exact path component) and filename (a glob over
+    the last component); other rule types return None.
+    """
+    if rule_type == ExclusionRuleType.FOLDER_NAME.value:
+        regex = f"(?:^|{_SEP}){re.escape(pattern)}(?:{_SEP}|$)"
+    elif rule_type == ExclusionRuleType.FILENAME.value:
+        regex = f"(?:^|{_SEP}){_glob_to_regex(pattern)}$"
+    else:
+        return None
+    return f"(?i:{regex})" if _FOLD_CASE else regex
+
+
+@functools.lru_cache(maxsize=1)
+def compiled_default_excludes() -> re.Pattern:
+    """All path-based default rules fused into one regex, one named group per rule."""
+    parts = []
+    for i, rule in enumerate(DEFAULT_EXCLUSION_RULES):
+        regex = rule_to_regex(rule["rule_type"], rule["pattern"])
+        if regex is not None:
+            parts.append(f"(?P<r{i}>{regex})")
+    return re.compile("|".join(parts))
+
+
+def matches_any(path: str) -> int | None:
+    """Priority of a path-based default rule matching path, or None."""
+    m = compiled_default_excludes().search(path)
+    if m is None:
+        return None
+    return DEFAULT_EXCLUSION_RULES[int(m.lastgroup[1:])]["priority"]
+
+
+# Compiled rule forms: a regex for glob/regex rules, a (kind, value) pair for
+# folder-name and size rules, None for a pattern that can't be compiled.
+CompiledRule = re.Pattern | tuple[str, int | str] | None
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_rule(rule_type: str, pattern: str) -> CompiledRule:
+    """Compile a rule pattern once per (rule_type, pattern).
+
+    Globs are compiled against os.path.normcase'd input, like fnmatch.
+    """
+    if rule_type in (ExclusionRuleType.FOLDER_PATH.value, ExclusionRuleType.FILENAME.value):
+        return re.compile(fnmatch.translate(os.path.normcase(pattern)))
+    if rule_type == ExclusionRuleType.REGEX.value:
+        try:
+            return re.compile(pattern)
+        except re.error:
+            return None
+    if rule_type in (ExclusionRuleType.SIZE_MIN.value, ExclusionRuleType.SIZE_MAX.value):
+        try:
+            return (rule_type, int(pattern))
+        except ValueError:
+            return None
+    if rule_type == ExclusionRuleType.FOLDER_NAME.value:
+        return (rule_type, pattern)
+    return None
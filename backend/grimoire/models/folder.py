@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING
 from sqlalchemy import Boolean, DateTime, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from grimoire.database import Base
+from grimoire.database import Base, safe_repr
 
 if TYPE_CHECKING:
     from grimoire.models.product import Product
@@ -34,4 +34,4 @@ class WatchedFolder(Base):
     )
 
     def __repr__(self) -> str:
-        return f"<WatchedFolder(id={self.id}, path='{self.path}')>"
+        return safe_repr(self, 'id', 'path')
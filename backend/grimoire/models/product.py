@@ -1,14 +1,20 @@
 """Product model - represents a PDF in the library."""
 
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text, func
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import DDL, BigInteger, Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text, event, func, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
-from grimoire.database import Base
+from grimoire.database import Base, safe_repr
+
+# Length limits for Text columns, checked once on assignment
+MAX_FILE_NAME_LENGTH = 500
+MAX_TITLE_LENGTH = 500
 
 if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
     from grimoire.models.collection import CollectionProduct
     from grimoire.models.folder import WatchedFolder
     from grimoire.models.tag import ProductTag
@@ -26,26 +32,43 @@ class Product(Base):
         Index("ix_products_created_at", "created_at"),
         Index("ix_products_file_hash", "file_hash"),
         Index("ix_products_publisher", "publisher"),
-        Index("ix_products_is_duplicate", "is_duplicate"),
         Index("ix_products_file_size", "file_size"),
         Index("ix_products_system_type", "game_system", "product_type"),
         Index("ix_products_author", "author"),
         Index("ix_products_genre", "genre"),
+        # Partial index over the live library (not duplicate, not missing);
+        # the predicate matches how queries compare the flags
+        Index(
+            "ix_products_live",
+            "watched_folder_id",
+            "game_system",
+            sqlite_where=text("is_duplicate = 0 AND is_missing = 0"),
+            postgresql_where=text("NOT is_duplicate AND NOT is_missing"),
+        ),
+        # PostgreSQL: case-insensitive exact/prefix lookups and trigram
+        # substring search for ILIKE '%term%'. SQLite uses products_fts.
+        Index("ix_products_title_lower", func.lower(text("title"))).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_products_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
     # File information
     file_path: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
-    file_name: Mapped[str] = mapped_column(String(500), nullable=False)
-    file_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    file_name: Mapped[str] = mapped_column(Text, nullable=False)
+    file_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
     file_hash: Mapped[str] = mapped_column(String(64), nullable=False)
     watched_folder_id: Mapped[int | None] = mapped_column(
         Integer, ForeignKey("watched_folders.id"), nullable=True
     )
 
     # Basic metadata
-    title: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    title: Mapped[str | None] = mapped_column(Text, nullable=True)
     author: Mapped[str | None] = mapped_column(String(500), nullable=True)
     publisher: Mapped[str | None] = mapped_column(String(255), nullable=True)
     publication_year: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -130,8 +153,11 @@ class Product(Base):
     watched_folder: Mapped["WatchedFolder | None"] = relationship(
         "WatchedFolder", back_populates="products"
     )
+    # Tags are rendered with nearly every product, so batch-load them with one
+    # IN query per result set rather than lazily per product
     product_tags: Mapped[list["ProductTag"]] = relationship(
-        "ProductTag", back_populates="product", cascade="all, delete-orphan"
+        "ProductTag", back_populates="product", cascade="all, delete-orphan",
+        lazy="selectin",
     )
     collection_products: Mapped[list["CollectionProduct"]] = relationship(
         "CollectionProduct", back_populates="product", cascade="all, delete-orphan"
@@ -139,7 +165,7 @@ class Product(Base):
     
     # Self-referential relationship for duplicates
     duplicate_of: Mapped["Product | None"] = relationship(
-        "Product", remote_side="Product.id", foreign_keys="Product.duplicate_of_id"
+        "Product", remote_side=[id], foreign_keys=[duplicate_of_id]
     )
     
     # Run notes
@@ -147,5 +173,49 @@ class Product(Base):
         "RunNote", back_populates="product", cascade="all, delete-orphan"
     )
 
+    @classmethod
+    async def bulk_upsert(
+        cls,
+        session: "AsyncSession",
+        rows: list[dict[str, Any]],
+        chunk: int = 5000,
+    ) -> None:
+        """Insert products in multi-row statements, updating rows whose file_path exists.
+
+        Every row must have the same keys. Column defaults apply to keys left
+        out, and on conflict only the given keys are overwritten. Bypasses
+        the ORM, so @validates hooks and identity-map objects are not touched.
+        """
+        if not rows:
+            return
+        if session.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        update_keys = [key for key in rows[0] if key != "file_path"]
+        for i in range(0, len(rows), chunk):
+            stmt = insert(cls).values(rows[i:i + chunk])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["file_path"],
+                set_={key: stmt.excluded[key] for key in update_keys},
+            )
+            await session.execute(stmt)
+
+    @validates("file_name", "title")
+    def _validate_length(self, key: str, value: str | None) -> str | None:
+        limit = MAX_FILE_NAME_LENGTH if key == "file_name" else MAX_TITLE_LENGTH
+        if value is not None and len(value) > limit:
+            raise ValueError(f"{key} exceeds {limit} characters")
+        return value
+
     def __repr__(self) -> str:
-        return f"<Product(id={self.id}, title='{self.title}', file_name='{self.file_name}')>"
+        return safe_repr(self, 'id', 'title', 'file_name')
+
+
+# gin_trgm_ops needs the pg_trgm extension before the products table is created
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
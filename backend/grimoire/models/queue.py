@@ -2,16 +2,27 @@
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Text, func
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, Text, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
-from grimoire.database import Base
+from grimoire.database import Base, safe_repr
 
 
 class ProcessingQueue(Base):
     """A queued processing task."""
 
     __tablename__ = "processing_queue"
+    __table_args__ = (
+        # The scheduler pulls status = 'pending' ordered by priority DESC,
+        # created_at ASC; index only the pending rows, in that order
+        Index(
+            "ix_queue_pending",
+            text("priority DESC"),
+            "created_at",
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     product_id: Mapped[int] = mapped_column(
@@ -32,4 +43,4 @@ class ProcessingQueue(Base):
     completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     def __repr__(self) -> str:
-        return f"<ProcessingQueue(id={self.id}, task_type='{self.task_type}', status='{self.status}')>"
+        return safe_repr(self, 'id', 'task_type', 'status')
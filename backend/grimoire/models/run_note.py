@@ -1,17 +1,20 @@
 """RunNote model - GM notes about running products/adventures."""
 
-from datetime import datetime, UTC
+from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from grimoire.database import Base
+from grimoire.database import Base, safe_repr
 
 
 class RunNote(Base):
     """A GM's note about running a product/adventure."""
 
     __tablename__ = "run_notes"
+    __table_args__ = (
+        Index("ix_run_notes_product", "product_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     product_id: Mapped[int] = mapped_column(
@@ -34,7 +37,7 @@ class RunNote(Base):
         DateTime, nullable=False, server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, nullable=False, server_default=func.now(), onupdate=lambda: datetime.now(UTC)
+        DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
     )
 
     # Relationships
@@ -42,4 +45,4 @@ class RunNote(Base):
     campaign: Mapped["Campaign | None"] = relationship("Campaign", back_populates="run_notes")
 
     def __repr__(self) -> str:
-        return f"<RunNote(id={self.id}, title='{self.title}', type='{self.note_type}')>"
+        return safe_repr(self, 'id', 'title', 'note_type')
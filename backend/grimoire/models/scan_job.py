@@ -1,12 +1,16 @@
 """Scan job model for tracking library scan progress."""
 
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import Boolean, DateTime, Integer, String, Text, func
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, case, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column
 
-from grimoire.database import Base
+from grimoire.database import Base, safe_repr
 
 
 class ScanJobStatus(str, Enum):
@@ -20,6 +24,15 @@ class ScanJobStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+# Statuses of a scan that has not finished yet
+_RUNNING_STATUSES = frozenset({
+    ScanJobStatus.PENDING.value,
+    ScanJobStatus.SCANNING.value,
+    ScanJobStatus.HASHING.value,
+    ScanJobStatus.PROCESSING.value,
+})
+
+
 class ScanJob(Base):
     """Tracks progress of a library scan operation."""
 
@@ -54,22 +67,91 @@ class ScanJob(Base):
         DateTime, nullable=False, server_default=func.now()
     )
 
-    @property
+    @hybrid_property
     def progress_percent(self) -> float:
         """Calculate progress percentage."""
         if self.total_files == 0:
             return 0.0
         return round((self.processed_files / self.total_files) * 100, 1)
     
-    @property
+    @progress_percent.inplace.expression
+    @classmethod
+    def _progress_percent_expression(cls):
+        return case(
+            (cls.total_files == 0, 0.0),
+            else_=func.round(cls.processed_files * 100.0 / cls.total_files, 1),
+        )
+    
+    @hybrid_property
     def is_running(self) -> bool:
         """Check if scan is currently running."""
-        return self.status in (
-            ScanJobStatus.PENDING.value,
-            ScanJobStatus.SCANNING.value,
-            ScanJobStatus.HASHING.value,
-            ScanJobStatus.PROCESSING.value,
-        )
+        return self.status in _RUNNING_STATUSES
+    
+    @is_running.inplace.expression
+    @classmethod
+    def _is_running_expression(cls):
+        return cls.status.in_(sorted(_RUNNING_STATUSES))
 
     def __repr__(self) -> str:
-        return f"<ScanJob(id={self.id}, status='{self.status}', progress={self.progress_percent}%)>"
+        return safe_repr(self, 'id', 'status', 'processed_files', 'total_files')
+
+
+# Write-behind thresholds for scan progress: flush after this many files or
+# this many seconds, whichever comes first.
+PROGRESS_FLUSH_FILES = 500
+PROGRESS_FLUSH_INTERVAL = 1.0
+
+
+@dataclass
+class ScanJobProgress:
+    """In-memory scan counters, written to ``scan_jobs`` in periodic increments.
+
+    The scanner bumps these per file instead of dirtying the ORM row, and
+    ``flush`` adds the accumulated deltas with a single atomic UPDATE.
+    """
+
+    processed_delta: int = 0
+    new_delta: int = 0
+    updated_delta: int = 0
+    dup_delta: int = 0
+    excluded_delta: int = 0
+    err_delta: int = 0
+    current_file: str | None = None
+    last_flush_ts: float = field(default_factory=time.monotonic)
+
+    def due(self) -> bool:
+        """Whether enough work or time has accumulated to warrant a flush."""
+        return (
+            self.processed_delta >= PROGRESS_FLUSH_FILES
+            or time.monotonic() - self.last_flush_ts > PROGRESS_FLUSH_INTERVAL
+        )
+
+    async def flush(self, session: AsyncSession, job_id: int, force: bool = False) -> bool:
+        """Add pending deltas to the job row. Does not commit.
+
+        Returns True if an UPDATE was issued.
+        """
+        if not force and not self.due():
+            return False
+
+        await session.execute(
+            update(ScanJob)
+            .where(ScanJob.id == job_id)
+            .values(
+                processed_files=ScanJob.processed_files + self.processed_delta,
+                new_products=ScanJob.new_products + self.new_delta,
+                updated_products=ScanJob.updated_products + self.updated_delta,
+                duplicates_found=ScanJob.duplicates_found + self.dup_delta,
+                excluded_files=ScanJob.excluded_files + self.excluded_delta,
+                errors=ScanJob.errors + self.err_delta,
+                current_file=self.current_file,
+            )
+        )
+        self.processed_delta = 0
+        self.new_delta = 0
+        self.updated_delta = 0
+        self.dup_delta = 0
+        self.excluded_delta = 0
+        self.err_delta = 0
+        self.last_flush_ts = time.monotonic()
+        return True
@@ -1,11 +1,46 @@
 """Settings model - key-value store for application settings."""
 
+import json
+import time
 from datetime import datetime
+from typing import Any
 
-from sqlalchemy import DateTime, String, Text, func
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import DateTime, String, Text, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, Session, mapped_column, object_session
 
-from grimoire.database import Base
+from grimoire.database import Base, safe_repr
+
+# Seconds a process may serve settings without re-reading the table
+SETTINGS_CACHE_TTL = 30.0
+
+
+class SettingsCache:
+    """Process-local read-through copy of the whole settings table.
+
+    Settings are read on hot paths (once per queued task or PDF) but change
+    rarely, so all of them are loaded with one query and served from a dict
+    until the TTL runs out or a write in this process invalidates them.
+    """
+
+    def __init__(self, ttl: float = SETTINGS_CACHE_TTL):
+        self.ttl = ttl
+        self._values: dict[str, str] = {}
+        self._expires = 0.0
+
+    async def values(self, session: AsyncSession) -> dict[str, str]:
+        """Get the raw (JSON-encoded) value of every setting."""
+        if time.monotonic() >= self._expires:
+            result = await session.execute(select(Setting.key, Setting.value))
+            self._values = dict(result.tuples().all())
+            self._expires = time.monotonic() + self.ttl
+        return self._values
+
+    def invalidate(self) -> None:
+        self._expires = 0.0
+
+
+settings_cache = SettingsCache()
 
 
 class Setting(Base):
@@ -20,5 +55,45 @@ class Setting(Base):
         DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
     )
 
+    @classmethod
+    async def get(cls, session: AsyncSession, key: str, default: Any = None) -> Any:
+        """Get a decoded setting value through the settings cache."""
+        raw = (await settings_cache.values(session)).get(key)
+        if raw is None:
+            return default
+        try:
+            return json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            return raw
+
+    @classmethod
+    async def set(cls, session: AsyncSession, key: str, value: Any) -> "Setting":
+        """Create or update a setting; the cache is invalidated on commit."""
+        setting = await session.get(cls, key)
+        if setting:
+            setting.value = json.dumps(value)
+        else:
+            setting = cls(key=key, value=json.dumps(value))
+            session.add(setting)
+        return setting
+
     def __repr__(self) -> str:
-        return f"<Setting(key='{self.key}')>"
+        return safe_repr(self, 'key')
+
+
+@event.listens_for(Setting, "after_insert")
+@event.listens_for(Setting, "after_update")
+@event.listens_for(Setting, "after_delete")
+def _mark_settings_changed(mapper, connection, target: Setting) -> None:
+    # Drop the cache now, and again once the write is visible to other
+    # sessions, so a read in between can't keep the old value for a full TTL
+    settings_cache.invalidate()
+    session = object_session(target)
+    if session is not None:
+        session.info["settings_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_settings_after_commit(session: Session) -> None:
+    if session.info.pop("settings_changed", False):
+        settings_cache.invalidate()
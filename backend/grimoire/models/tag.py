@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING
 from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from grimoire.database import Base
+from grimoire.database import Base, safe_repr
 
 if TYPE_CHECKING:
     from grimoire.models.product import Product
@@ -32,7 +32,7 @@ class Tag(Base):
     )
 
     def __repr__(self) -> str:
-        return f"<Tag(id={self.id}, name='{self.name}')>"
+        return safe_repr(self, 'id', 'name')
 
 
 class ProductTag(Base):
@@ -55,7 +55,7 @@ class ProductTag(Base):
 
     # Relationships
     product: Mapped["Product"] = relationship("Product", back_populates="product_tags")
-    tag: Mapped["Tag"] = relationship("Tag", back_populates="product_tags")
+    tag: Mapped["Tag"] = relationship("Tag", back_populates="product_tags", lazy="joined")
 
     def __repr__(self) -> str:
-        return f"<ProductTag(product_id={self.product_id}, tag_id={self.tag_id})>"
+        return safe_repr(self, 'product_id', 'tag_id')
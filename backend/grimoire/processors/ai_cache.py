@@ -0,0 +1,168 @@
+"""
+Response cache for AI identification, tagging and structured extraction calls.
+Results are keyed on the exact provider, model, task and input text, so
+re-processing the same PDF returns the stored answer without another API call.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import aiosqlite
+
+from grimoire.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Recently used entries kept in memory in front of the SQLite file
+MEMORY_CACHE_SIZE = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_cache (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+)
+"""
+
+
+def cache_key(provider: str, model: str, task_type: str, text: str) -> str:
+    """Content address of an AI request."""
+    return hashlib.sha256(f"{provider}|{model}|{task_type}|{text}".encode()).hexdigest()
+
+
+class LLMCache:
+    """Two-level (memory LRU + SQLite) cache of AI JSON responses."""
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float,
+        max_entries: int,
+        memory_size: int = MEMORY_CACHE_SIZE,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_size = memory_size
+        self._memory: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._schema_ready = False
+
+    async def _connect(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.path)
+        if not self._schema_ready:
+            await db.execute(_SCHEMA)
+            await db.commit()
+            self._schema_ready = True
+        return db
+
+    def _remember(self, key: str, expires_at: float, response: dict[str, Any]) -> None:
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        """Return a cached response, or None on a miss or expired entry."""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                return dict(response)
+            del self._memory[key]
+
+        try:
+            db = await self._connect()
+            try:
+                cursor = await db.execute(
+                    "SELECT response, expires_at FROM ai_cache WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                )
+                row = await cursor.fetchone()
+                if row is None:
+                    return None
+                await db.execute(
+                    "UPDATE ai_cache SET last_used_at = ? WHERE key = ?", (now, key)
+                )
+                await db.commit()
+            finally:
+                await db.close()
+        except Exception as e:
+            logger.warning(f"AI cache read failed: {e}")
+            return None
+
+        response = json.loads(row[0])
+        self._remember(key, row[1], response)
+        return dict(response)
+
+    async def set(self, key: str, provider: str, model: str, response: dict[str, Any]) -> None:
+        """Store a response."""
+        now = time.time()
+        expires_at = now + self.ttl
+        self._remember(key, expires_at, dict(response))
+        try:
+            db = await self._connect()
+            try:
+                await db.execute(
+                    "INSERT OR REPLACE INTO ai_cache "
+                    "(key, provider, model, response, created_at, expires_at, last_used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, provider, model, json.dumps(response), now, expires_at, now),
+                )
+                await db.commit()
+            finally:
+                await db.close()
+        except Exception as e:
+            logger.warning(f"AI cache write failed: {e}")
+
+    async def prune(self) -> int:
+        """Drop expired entries, then the least recently used beyond max_entries.
+
+        Returns the number of rows deleted.
+        """
+        db = await self._connect()
+        try:
+            cursor = await db.execute(
+                "DELETE FROM ai_cache WHERE expires_at <= ?", (time.time(),)
+            )
+            deleted = cursor.rowcount
+            cursor = await db.execute(
+                "DELETE FROM ai_cache WHERE key NOT IN "
+                "(SELECT key FROM ai_cache ORDER BY last_used_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            deleted += cursor.rowcount
+            await db.commit()
+        finally:
+            await db.close()
+        return deleted
+
+
+ai_cache = LLMCache(
+    settings.data_dir / "ai_cache.sqlite",
+    ttl=settings.ai_cache_ttl,
+    max_entries=settings.ai_cache_max_entries,
+)
+
+
+async def run_ai_cache_pruner(interval: float = 3600.0) -> None:
+    """Periodically drop expired and least recently used cached responses."""
+    while True:
+        try:
+            deleted = await ai_cache.prune()
+            if deleted:
+                logger.info(f"Pruned {deleted} AI cache entries")
+        except Exception as e:
+            logger.warning(f"AI cache prune failed: {e}")
+        await asyncio.sleep(interval)
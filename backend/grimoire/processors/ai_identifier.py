@@ -4,22 +4,96 @@ Uses LLMs to identify game system, publisher, product type, etc. from PDF conten
 """
 
 import asyncio
+import functools
 import json
 import logging
 import os
+import random
+import time
+import weakref
 from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 from typing import Any
 
 import httpx
 
 from grimoire.config import settings
+from grimoire.processors.ai_cache import ai_cache, cache_key
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 # Rate limiting settings
 DEFAULT_REQUEST_DELAY = 1.5  # seconds between requests to avoid rate limits
-MAX_RETRIES = 3
-INITIAL_BACKOFF = 5  # seconds
+MAX_RETRIES = 5
+INITIAL_BACKOFF = 1  # seconds, doubled per attempt
+MAX_BACKOFF = 30  # seconds, also caps a provider's Retry-After
+# Rate limits, overload (Anthropic's 529) and transient gateway failures
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504, 529})
+
+
+# Request timeouts; local Ollama models get longer to respond
+API_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+OLLAMA_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+# One pooled client per event loop, so connections (and TLS sessions) to the
+# providers are reused across calls. Keyed weakly so a closed loop's client
+# is dropped with it.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _loads(data: str | bytes) -> Any:
+    """Parse JSON with orjson when installed; its errors subclass json.JSONDecodeError."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def get_ai_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client for the running event loop.
+
+    Used for every AI provider request, including structured extraction.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=API_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.ai_max_connections,
+                max_keepalive_connections=settings.ai_max_connections // 2,
+                keepalive_expiry=30.0,
+            ),
+            http2=HTTP2_AVAILABLE,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_ai_clients() -> None:
+    """Close the shared HTTP client of the running event loop."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
 
 
 # Approximate pricing per 1M tokens (as of late 2024)
@@ -61,9 +135,116 @@ class CostEstimate:
     is_free: bool
 
 
-def estimate_tokens(text: str) -> int:
-    """Estimate token count for text. Rough approximation: ~4 chars per token."""
-    return len(text) // 4
+# Threads tiktoken may use to encode a batch of texts
+TOKENIZER_THREADS = 8
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding(model: str) -> "tiktoken.Encoding | None":
+    """Tokenizer for a model, or None to fall back to the ~4 chars/token heuristic.
+    
+    Non-OpenAI models (Anthropic, Ollama) are approximated with cl100k_base.
+    """
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use, which fails offline
+        logger.warning(f"tiktoken encoding unavailable for {model}, estimating by length: {e}")
+        return None
+
+
+def estimate_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Count tokens in text with tiktoken, or approximate at ~4 chars per token."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def estimate_tokens_batch(texts: list[str], model: str = "gpt-4o-mini") -> list[int]:
+    """Token counts for many texts, encoded in parallel by tiktoken when available."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return [len(text) // 4 for text in texts]
+    encoded = encoding.encode_batch(
+        texts, num_threads=TOKENIZER_THREADS, disallowed_special=()
+    )
+    return [len(tokens) for tokens in encoded]
+
+
+# Estimated response size per task, in tokens
+ESTIMATED_OUTPUT_TOKENS = {
+    # identify_product and suggest_tags both run the combined analysis
+    "analyze": 350,  # Metadata + tags JSON ~350 tokens
+    "identify": 350,
+    "suggest_tags": 350,
+}
+
+# Prompt overhead per request, in tokens: the fixed system instructions
+# (PROMPT_GUIDE plus the task), before any prompt-cache discount
+PROMPT_OVERHEAD_TOKENS = 1450
+
+# PDF text sent with each request: the opening pages (title, credits) and the
+# closing ones (back matter, publisher page), trimmed to a token budget
+CONTEXT_HEAD_CHARS = 2000
+CONTEXT_TAIL_CHARS = 1500
+CONTEXT_SEPARATOR = "\n---\n"
+CONTEXT_BUDGET_TOKENS = 800
+
+_FREE_PRICING = {"input": 0.0, "output": 0.0}
+
+
+def _context_window(text: str) -> tuple[str, str]:
+    """Head and tail of text to identify from; the tail is empty for short texts."""
+    if len(text) <= CONTEXT_HEAD_CHARS + CONTEXT_TAIL_CHARS:
+        return text, ""
+    return text[:CONTEXT_HEAD_CHARS], text[-CONTEXT_TAIL_CHARS:]
+
+
+def build_identification_context(
+    full_text: str,
+    budget_tokens: int = CONTEXT_BUDGET_TOKENS,
+) -> str:
+    """
+    Build the text sent for identification within a token budget.
+    
+    Keeps the start of the document (cover, title page, credits) and its end
+    (back matter, publisher info), trimming the longer of the two until the
+    whole fits in budget_tokens.
+    """
+    head, tail = _context_window(full_text)
+    while True:
+        context = f"{head}{CONTEXT_SEPARATOR}{tail}" if tail else head
+        excess = estimate_tokens(context) - budget_tokens
+        if excess <= 0 or not context:
+            return context
+        # Drop roughly the excess (~4 chars per token) from the longer part
+        cut = max(excess * 4, 16)
+        if len(head) >= len(tail):
+            head = head[:-cut]
+        else:
+            tail = tail[cut:]
+
+
+def _resolve(provider: str | None, model: str | None) -> tuple[str, str, dict[str, float]]:
+    """Resolve the provider, model and per-1M-token pricing to estimate with."""
+    if provider is None:
+        if os.getenv("OPENAI_API_KEY"):
+            provider = "openai"
+        elif os.getenv("ANTHROPIC_API_KEY"):
+            provider = "anthropic"
+        else:
+            provider = "ollama"
+    
+    if model is None:
+        model = DEFAULT_MODELS.get(provider, "gpt-4o-mini")
+    
+    return provider, model, MODEL_PRICING.get(model, _FREE_PRICING)
 
 
 def estimate_cost(
@@ -84,34 +265,12 @@ def estimate_cost(
     Returns:
         CostEstimate with pricing breakdown
     """
-    # Determine provider
-    if provider is None:
-        if os.getenv("OPENAI_API_KEY"):
-            provider = "openai"
-        elif os.getenv("ANTHROPIC_API_KEY"):
-            provider = "anthropic"
-        else:
-            provider = "ollama"
-    
-    # Determine model
-    if model is None:
-        model = DEFAULT_MODELS.get(provider, "gpt-4o-mini")
-    
-    # Get pricing
-    pricing = MODEL_PRICING.get(model, {"input": 0.0, "output": 0.0})
+    provider, model, pricing = _resolve(provider, model)
     
-    # Estimate tokens
-    # Include prompt template overhead (~200 tokens)
-    prompt_overhead = 200
-    input_tokens = estimate_tokens(text[:4000]) + prompt_overhead
-    
-    # Estimate output tokens based on task
-    if task_type == "identify":
-        estimated_output = 150  # JSON response ~150 tokens
-    elif task_type == "suggest_tags":
-        estimated_output = 200  # Tag suggestions ~200 tokens
-    else:
-        estimated_output = 200
+    input_tokens = min(
+        estimate_tokens("".join(_context_window(text)), model), CONTEXT_BUDGET_TOKENS
+    ) + PROMPT_OVERHEAD_TOKENS
+    estimated_output = ESTIMATED_OUTPUT_TOKENS.get(task_type, 200)
     
     # Calculate costs (pricing is per 1M tokens)
     input_cost = (input_tokens / 1_000_000) * pricing["input"]
@@ -139,18 +298,29 @@ def estimate_batch_cost(
     """
     Estimate cost for processing multiple items.
     
+    The provider, model and pricing are resolved once for the whole batch,
+    and all texts are tokenized in one batch call.
+    
     Returns:
         Dictionary with total cost and per-item breakdown
     """
-    estimates = [estimate_cost(text, provider, model, task_type) for text in texts]
+    provider, model, pricing = _resolve(provider, model)
     
-    total_input_tokens = sum(e.input_tokens for e in estimates)
-    total_output_tokens = sum(e.estimated_output_tokens for e in estimates)
-    total_cost = sum(e.total_cost for e in estimates)
+    context_tokens = estimate_tokens_batch(
+        ["".join(_context_window(text)) for text in texts], model
+    )
+    total_input_tokens = PROMPT_OVERHEAD_TOKENS * len(texts) + sum(
+        min(tokens, CONTEXT_BUDGET_TOKENS) for tokens in context_tokens
+    )
+    total_output_tokens = ESTIMATED_OUTPUT_TOKENS.get(task_type, 200) * len(texts)
+    total_cost = (
+        (total_input_tokens / 1_000_000) * pricing["input"]
+        + (total_output_tokens / 1_000_000) * pricing["output"]
+    )
     
     return {
-        "provider": estimates[0].provider if estimates else provider,
-        "model": estimates[0].model if estimates else model,
+        "provider": provider,
+        "model": model,
         "item_count": len(texts),
         "total_input_tokens": total_input_tokens,
         "total_output_tokens": total_output_tokens,
@@ -160,131 +330,413 @@ def estimate_batch_cost(
     }
 
 
-IDENTIFICATION_PROMPT = """Analyze this RPG PDF text and return a JSON object with these fields:
-- game_system: e.g. "Dungeons & Dragons 5th Edition", "Pathfinder 2nd Edition", "Dungeon Crawl Classics", "Old-School Essentials", or null
-- genre: one of "Fantasy", "Horror", "Science Fiction", "Modern", "Historical", or null
-- product_type: e.g. "Adventure", "Supplement", "Core Rulebook", "Bestiary", "Setting", "Zine", or null  
-- publisher: publisher name or null
-- author: primary author/writer name(s) or null
-- title: product title or null
-- publication_year: year as number or null
-- level_range_min: minimum character level or null
-- level_range_max: maximum character level or null
-- description: 1-2 sentence description or null
-- confidence: "high", "medium", or "low"
+# Prompts are split into a fixed system message and a user message holding only
+# the PDF text. Providers cache long identical prompt prefixes (OpenAI from
+# 1024 tokens, automatically; Anthropic with cache_control), so the shared
+# guide is deliberately detailed and always comes first.
+PROMPT_GUIDE = """You catalogue tabletop roleplaying game (RPG) PDFs for a personal library manager. You are given text extracted from the start and end of one PDF (cover, title page, credits, table of contents, back matter), separated by a line containing only "---". Extraction can be noisy: headers and footers repeat, words may be hyphenated across lines, and scanned pages may contain OCR errors. Base every answer on the text itself, not on assumptions.
+
+## Metadata fields
+
+- game_system: The rules system the product is written for, using its common full name with edition, e.g. "Dungeons & Dragons 5th Edition", "Dungeons & Dragons 3.5", "Pathfinder 1st Edition", "Pathfinder 2nd Edition", "Starfinder", "Call of Cthulhu 7th Edition", "Dungeon Crawl Classics", "Old-School Essentials", "Mörk Borg", "Shadowdark", "Cypher System", "Savage Worlds", "Fate Core", "Blades in the Dark", "Powered by the Apocalypse", "OSR" (system-neutral old-school content), "System Neutral". Look for compatibility statements ("for use with...", "compatible with...", license text such as the OGL, ORC or a 5E SRD notice), stat block formats and rules terms. null if it cannot be determined.
+- genre: Exactly one of "Fantasy", "Horror", "Science Fiction", "Modern", "Historical", or null. Choose the dominant genre; dark fantasy is "Fantasy", cosmic horror is "Horror", cyberpunk and space opera are "Science Fiction".
+- product_type: The kind of book, e.g. "Adventure", "Campaign", "Supplement", "Core Rulebook", "Bestiary", "Setting", "Player Options", "Zine", "Map Pack", "Character Sheets", "Quickstart", "Magazine". A single scenario or module is an "Adventure"; a long multi-chapter storyline is a "Campaign"; a book of monsters is a "Bestiary".
+- publisher: The publishing company or imprint, as printed (often near the copyright notice or logo). null for none.
+- author: The primary writer or writers, comma separated, from the credits ("Written by", "Design", "Author"). Do not include editors, artists or layout staff. null if not credited.
+- title: The product title as printed on the cover or title page, without the publisher name or product code. Keep subtitles after a colon.
+- publication_year: Four-digit year from the copyright notice or printing history; the latest printing if several are listed. null if absent.
+- level_range_min / level_range_max: Character levels the content is designed for, e.g. "for characters of levels 3-5" gives 3 and 5, "a 1st-level adventure" gives 1 and 1. null for products without levels.
+- description: One or two plain sentences summarising what the product is and contains. No marketing language.
+- confidence: "high" when title and system are stated explicitly, "medium" when one is inferred, "low" when the text is too short or noisy to be sure.
+
+## Tag fields
+
+Tags are short lowercase phrases, hyphenated when they have several words. Only include tags that are clearly supported by the content, 3-5 per category at most; an empty array is fine.
+
+- themes: What the content is about, e.g. "horror", "wilderness", "urban", "dungeon", "mystery", "political", "heist", "exploration", "survival", "war", "intrigue", "hexcrawl", "megadungeon", "investigation", "pirates", "undead", "fey", "planar".
+- content_types: What the book provides, e.g. "monsters", "maps", "random-tables", "npcs", "magic-items", "puzzles", "spells", "classes", "pregenerated-characters", "handouts", "encounters", "treasure", "rules-variants".
+- settings: The world or setting style, e.g. "fantasy", "sci-fi", "post-apocalyptic", "historical", "gothic", "weird-west", "steampunk", "sword-and-sorcery", "forgotten-realms", "golarion".
+- tone: The intended mood, e.g. "grimdark", "comedic", "heroic", "sandbox", "lighthearted", "pulp", "gritty", "whimsical".
+- confidence: "high", "medium" or "low", as for metadata.
+
+## Examples
 
-Text to analyze:
-{text}
+Text: "THE SUNLESS CITADEL ... An adventure for four 1st-level characters ... Dungeons & Dragons ... Wizards of the Coast ... Design: Bruce R. Cordell ... ©2000"
+Metadata: {"game_system": "Dungeons & Dragons 3rd Edition", "genre": "Fantasy", "product_type": "Adventure", "publisher": "Wizards of the Coast", "author": "Bruce R. Cordell", "title": "The Sunless Citadel", "publication_year": 2000, "level_range_min": 1, "level_range_max": 1, "description": "An introductory dungeon adventure set in a sunken fortress overrun by goblins and kobolds.", "confidence": "high"}
+Tags: {"themes": ["dungeon", "exploration"], "content_types": ["maps", "monsters", "npcs"], "settings": ["fantasy"], "tone": ["heroic"], "confidence": "high"}
 
-Return ONLY the JSON object, nothing else."""
+Text: "MASKS OF NYARLATHOTEP ... A Call of Cthulhu campaign ... Chaosium Inc. ... Larry DiTillio, Lynn Willis ... investigators travel from New York to London, Cairo, Kenya, Shanghai ..."
+Metadata: {"game_system": "Call of Cthulhu 7th Edition", "genre": "Horror", "product_type": "Campaign", "publisher": "Chaosium Inc.", "author": "Larry DiTillio, Lynn Willis", "title": "Masks of Nyarlathotep", "publication_year": null, "level_range_min": null, "level_range_max": null, "description": "A globe-spanning investigative horror campaign in which investigators race to stop a cult of Nyarlathotep.", "confidence": "medium"}
+Tags: {"themes": ["investigation", "mystery", "horror"], "content_types": ["handouts", "npcs", "maps"], "settings": ["historical"], "tone": ["gritty", "pulp"], "confidence": "high"}
 
+## Output
 
-TAG_SUGGESTION_PROMPT = """Analyze this RPG PDF text and suggest relevant tags.
+Return only a JSON object, with no commentary before or after it. Use null for unknown values rather than guessing, and never invent a publisher, author or year that does not appear in the text."""
 
-Return a JSON object with:
-- themes: array of theme tags (e.g. "horror", "wilderness", "urban", "dungeon", "mystery", "political")
-- content_types: array of content type tags (e.g. "monsters", "maps", "random-tables", "npcs", "magic-items", "puzzles")
-- settings: array of setting tags (e.g. "fantasy", "sci-fi", "post-apocalyptic", "historical")
-- tone: array of tone tags (e.g. "grimdark", "comedic", "heroic", "sandbox")
-- confidence: "high", "medium", or "low"
 
-Only include tags that are clearly present in the content. Limit to 3-5 tags per category.
 
-Text to analyze:
-{text}
+IDENTIFICATION_INSTRUCTIONS = PROMPT_GUIDE + """
 
-Return ONLY the JSON object, nothing else."""
+## Task
+
+Identify the product. Return a JSON object with exactly the metadata fields:
+game_system, genre, product_type, publisher, author, title, publication_year,
+level_range_min, level_range_max, description, confidence."""
+
+
+ANALYSIS_INSTRUCTIONS = PROMPT_GUIDE + """
+
+## Task
+
+Identify the product and suggest tags for it. Return a JSON object with two keys:
+- metadata: an object with exactly the metadata fields
+- tags: an object with exactly the tag fields (themes, content_types, settings, tone, confidence)"""
+
+
+USER_PROMPT = """Text to analyze:
+
+{text}"""
+
+
+_NULLABLE_STRING = {"type": ["string", "null"]}
+_NULLABLE_INTEGER = {"type": ["integer", "null"]}
+_CONFIDENCE = {"type": "string", "enum": ["high", "medium", "low"]}
+_TAG_LIST = {"type": "array", "items": {"type": "string"}}
+
+
+def _object_schema(properties: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+# JSON schema of the ANALYSIS_INSTRUCTIONS answer, for structured outputs / tool use
+ANALYSIS_SCHEMA = _object_schema({
+    "metadata": _object_schema({
+        "game_system": _NULLABLE_STRING,
+        "genre": _NULLABLE_STRING,
+        "product_type": _NULLABLE_STRING,
+        "publisher": _NULLABLE_STRING,
+        "author": _NULLABLE_STRING,
+        "title": _NULLABLE_STRING,
+        "publication_year": _NULLABLE_INTEGER,
+        "level_range_min": _NULLABLE_INTEGER,
+        "level_range_max": _NULLABLE_INTEGER,
+        "description": _NULLABLE_STRING,
+        "confidence": _CONFIDENCE,
+    }),
+    "tags": _object_schema({
+        "themes": _TAG_LIST,
+        "content_types": _TAG_LIST,
+        "settings": _TAG_LIST,
+        "tone": _TAG_LIST,
+        "confidence": _CONFIDENCE,
+    }),
+})
+
+
+def _parse_anthropic_json(content: str) -> dict[str, Any]:
+    """Parse the JSON object in an Anthropic reply, ignoring any text around it."""
+    content = content.strip()
+    
+    # Handle JSON that may have newlines inside strings
+    # Find the outermost JSON object
+    start_idx = content.find('{')
+    end_idx = content.rfind('}')
+    
+    if start_idx != -1 and end_idx != -1:
+        json_str = content[start_idx:end_idx + 1]
+        return _loads(json_str)
+    
+    return _loads(content)
+
+
+def _cached_system(instructions: str) -> list[dict[str, Any]]:
+    """Anthropic system prompt marked as a cacheable prefix."""
+    return [{"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}}]
+
+
+def _cached_tokens(usage: dict[str, Any] | None) -> int:
+    """Prompt tokens served from the provider's prompt cache, from a usage block."""
+    if not usage:
+        return 0
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or usage.get("cache_read_input_tokens") or 0
+
+
+def _openai_identify_body(text: str, model: str) -> dict[str, Any]:
+    """Chat completions request body for identifying one text."""
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": IDENTIFICATION_INSTRUCTIONS},
+            {"role": "user", "content": USER_PROMPT.format(text=text)},
+        ],
+        "temperature": 0.1,
+        "response_format": {"type": "json_object"},
+    }
+
+
+def _anthropic_identify_params(text: str, model: str) -> dict[str, Any]:
+    """Messages request parameters for identifying one text."""
+    return {
+        "model": model,
+        "max_tokens": 1024,
+        "system": _cached_system(IDENTIFICATION_INSTRUCTIONS),
+        "messages": [
+            {"role": "user", "content": USER_PROMPT.format(text=text)}
+        ],
+    }
 
 
 async def identify_with_openai(text: str, api_key: str, model: str = "gpt-4o-mini") -> dict[str, Any]:
     """Use OpenAI API for identification."""
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": model,
-                "messages": [
-                    {"role": "user", "content": IDENTIFICATION_PROMPT.format(text=text)}
-                ],
-                "temperature": 0.1,
-                "response_format": {"type": "json_object"},
-            },
-        )
-        response.raise_for_status()
-        data = response.json()
-        content = data["choices"][0]["message"]["content"]
-        return json.loads(content)
+    client = get_ai_client()
+    response = await client.post(
+        "https://api.openai.com/v1/chat/completions",
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        },
+        json=_openai_identify_body(text, model),
+    )
+    response.raise_for_status()
+    data = _loads(response.content)
+    content = data["choices"][0]["message"]["content"]
+    return _loads(content)
 
 
 async def identify_with_anthropic(text: str, api_key: str, model: str = "claude-3-haiku-20240307") -> dict[str, Any]:
     """Use Anthropic API for identification."""
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "x-api-key": api_key,
-                "Content-Type": "application/json",
-                "anthropic-version": "2023-06-01",
-            },
-            json={
-                "model": model,
-                "max_tokens": 1024,
-                "messages": [
-                    {"role": "user", "content": IDENTIFICATION_PROMPT.format(text=text)}
-                ],
-            },
-        )
-        response.raise_for_status()
-        data = response.json()
-        content = data["content"][0]["text"].strip()
-        
-        # Handle JSON that may have newlines inside strings
-        # Find the outermost JSON object
-        start_idx = content.find('{')
-        end_idx = content.rfind('}')
-        
-        if start_idx != -1 and end_idx != -1:
-            json_str = content[start_idx:end_idx + 1]
-            return json.loads(json_str)
-        
-        return json.loads(content)
+    client = get_ai_client()
+    response = await client.post(
+        "https://api.anthropic.com/v1/messages",
+        headers={
+            "x-api-key": api_key,
+            "Content-Type": "application/json",
+            "anthropic-version": "2023-06-01",
+        },
+        json=_anthropic_identify_params(text, model),
+    )
+    response.raise_for_status()
+    data = _loads(response.content)
+    return _parse_anthropic_json(data["content"][0]["text"])
 
 
 async def identify_with_ollama(text: str, base_url: str, model: str = "gemma3:12b") -> dict[str, Any]:
     """Use Ollama for local identification."""
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        response = await client.post(
-            f"{base_url}/api/generate",
-            json={
-                "model": model,
-                "prompt": IDENTIFICATION_PROMPT.format(text=text),
-                "stream": False,
-                "format": "json",
-            },
-        )
-        response.raise_for_status()
-        data = response.json()
-        content = data["response"]
-        return json.loads(content)
+    client = get_ai_client()
+    response = await client.post(
+        f"{base_url}/api/generate",
+        timeout=OLLAMA_TIMEOUT,
+        json={
+            "model": model,
+            "system": IDENTIFICATION_INSTRUCTIONS,
+            "prompt": USER_PROMPT.format(text=text),
+            "stream": False,
+            "format": "json",
+        },
+    )
+    response.raise_for_status()
+    data = _loads(response.content)
+    content = data["response"]
+    return _loads(content)
+
+
+# OpenAI model families that accept response_format json_schema (structured outputs)
+_OPENAI_JSON_SCHEMA_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o3", "o4")
+
+# (provider, model or server) pairs that rejected a JSON schema with HTTP 400
+_json_schema_rejected: set[tuple[str, str]] = set()
+
+
+async def analyze_with_openai(text: str, api_key: str, model: str = "gpt-4o-mini") -> dict[str, Any]:
+    """Use OpenAI structured outputs to identify and tag in one request.
+
+    Models without structured outputs (e.g. gpt-4-turbo) get plain JSON mode
+    instead, as does any model that rejects the schema with HTTP 400.
+    """
+    use_schema = (
+        model.startswith(_OPENAI_JSON_SCHEMA_MODELS)
+        and ("openai", model) not in _json_schema_rejected
+    )
+    if use_schema:
+        try:
+            return await _analyze_openai_request(text, api_key, model, {
+                "type": "json_schema",
+                "json_schema": {"name": "product_analysis", "strict": True, "schema": ANALYSIS_SCHEMA},
+            })
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 400:
+                raise
+            logger.warning(f"OpenAI rejected structured outputs for {model}, using JSON mode")
+    result = await _analyze_openai_request(text, api_key, model, {"type": "json_object"})
+    if use_schema:
+        # JSON mode worked where the schema didn't; skip the schema from now on
+        _json_schema_rejected.add(("openai", model))
+    return result
+
+
+async def _analyze_openai_request(
+    text: str, api_key: str, model: str, response_format: dict[str, Any]
+) -> dict[str, Any]:
+    client = get_ai_client()
+    response = await client.post(
+        "https://api.openai.com/v1/chat/completions",
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        },
+        json={
+            "model": model,
+            "messages": [
+                {"role": "system", "content": ANALYSIS_INSTRUCTIONS},
+                {"role": "user", "content": USER_PROMPT.format(text=text)},
+            ],
+            "temperature": 0.1,
+            "response_format": response_format,
+        },
+    )
+    response.raise_for_status()
+    data = _loads(response.content)
+    message = data["choices"][0]["message"]
+    if message.get("refusal"):
+        # Strict mode reports a refusal instead of content
+        raise ValueError(f"Model refused the request: {message['refusal']}")
+    content = message.get("content")
+    if content is None:
+        raise ValueError("AI response has no content")
+    result = _loads(content)
+    result["cached_tokens"] = _cached_tokens(data.get("usage"))
+    return result
+
+
+async def analyze_with_anthropic(text: str, api_key: str, model: str = "claude-3-haiku-20240307") -> dict[str, Any]:
+    """Use an Anthropic forced tool call to identify and tag in one request."""
+    client = get_ai_client()
+    response = await client.post(
+        "https://api.anthropic.com/v1/messages",
+        headers={
+            "x-api-key": api_key,
+            "Content-Type": "application/json",
+            "anthropic-version": "2023-06-01",
+        },
+        json={
+            "model": model,
+            "max_tokens": 1024,
+            "tools": [{
+                "name": "record_analysis",
+                "description": "Record the product metadata and suggested tags.",
+                "input_schema": ANALYSIS_SCHEMA,
+            }],
+            "tool_choice": {"type": "tool", "name": "record_analysis"},
+            "system": _cached_system(ANALYSIS_INSTRUCTIONS),
+            "messages": [
+                {"role": "user", "content": USER_PROMPT.format(text=text)}
+            ],
+        },
+    )
+    response.raise_for_status()
+    data = _loads(response.content)
+    result = next(
+        (block["input"] for block in data["content"] if block["type"] == "tool_use"), None
+    )
+    if result is None:
+        # No tool call; fall back to JSON in the text reply
+        result = _parse_anthropic_json(data["content"][0]["text"])
+    result["cached_tokens"] = _cached_tokens(data.get("usage"))
+    return result
+
+
+async def analyze_with_ollama(text: str, base_url: str, model: str = "gemma3:12b") -> dict[str, Any]:
+    """Use Ollama to identify and tag in one local request.
+
+    Schema-constrained output needs Ollama 0.5+; older servers reject it
+    with HTTP 400 and get plain JSON mode instead.
+    """
+    use_schema = ("ollama", base_url) not in _json_schema_rejected
+    if use_schema:
+        try:
+            return await _analyze_ollama_request(text, base_url, model, ANALYSIS_SCHEMA)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 400:
+                raise
+            logger.warning(f"Ollama at {base_url} rejected a JSON schema format, using JSON mode")
+    result = await _analyze_ollama_request(text, base_url, model, "json")
+    if use_schema:
+        _json_schema_rejected.add(("ollama", base_url))
+    return result
+
+
+async def _analyze_ollama_request(
+    text: str, base_url: str, model: str, response_format: str | dict[str, Any]
+) -> dict[str, Any]:
+    client = get_ai_client()
+    response = await client.post(
+        f"{base_url}/api/generate",
+        timeout=OLLAMA_TIMEOUT,
+        json={
+            "model": model,
+            "system": ANALYSIS_INSTRUCTIONS,
+            "prompt": USER_PROMPT.format(text=text),
+            "stream": False,
+            "format": response_format,
+        },
+    )
+    response.raise_for_status()
+    data = _loads(response.content)
+    content = data["response"]
+    return _loads(content)
+
+
+def _is_retryable(error: httpx.HTTPError) -> bool:
+    """Whether a failed provider call is worth repeating."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+
+def _retry_delay(error: httpx.HTTPError, attempt: int) -> float:
+    """Seconds to wait before retry number attempt + 1.
+
+    Honors the provider's Retry-After header when it sends one, otherwise
+    backs off exponentially with jitter so concurrent requests that failed
+    together don't retry together.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("retry-after")
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                # HTTP-date form
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = 0.0
+            if delay > 0:
+                return min(delay, MAX_BACKOFF)
+    backoff = min(INITIAL_BACKOFF * 2 ** attempt, MAX_BACKOFF)
+    return backoff + random.uniform(0, INITIAL_BACKOFF)
+
+
+def _describe_http_error(error: httpx.HTTPError) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}"
+    return type(error).__name__
 
 
 async def get_setting_from_db(key_name: str) -> str:
     """Get a setting value from database."""
     from grimoire.database import get_db_session
     from grimoire.models import Setting
-    from sqlalchemy import select
     
     try:
         async with get_db_session() as session:
-            query = select(Setting).where(Setting.key == key_name)
-            result = await session.execute(query)
-            setting = result.scalar_one_or_none()
-            if setting:
-                return json.loads(setting.value) or ""
+            return await Setting.get(session, key_name) or ""
     except Exception:
         pass
     return ""
@@ -299,23 +751,26 @@ async def get_ollama_url() -> str:
     return os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 
 
-async def identify_product(
+async def analyze_product(
     text: str,
     provider: str | None = None,
     model: str | None = None,
+    use_cache: bool = True,
 ) -> dict[str, Any]:
     """
-    Identify product metadata using AI.
+    Identify a product and suggest its tags in a single AI request.
     
     Args:
         text: Extracted text from the PDF
         provider: AI provider to use ("openai", "anthropic", "ollama", or None for auto)
         model: Specific model to use (optional)
+        use_cache: Return a stored response for an identical earlier request
     
     Returns:
-        Dictionary with identified metadata
+        Dictionary with "metadata" (as from identify_product) and "tags"
+        (as from suggest_tags), or "error"
     """
-    truncated_text = text[:4000]
+    truncated_text = build_identification_context(text)
     
     # Check env vars first, then database settings
     openai_key = os.getenv("OPENAI_API_KEY", "") or await get_setting_from_db("openai_api_key")
@@ -332,14 +787,20 @@ async def identify_product(
         else:
             return {"error": "No AI provider configured"}
     
-    # Retry loop with exponential backoff for rate limits
-    last_error = None
+    key = None
+    if use_cache and settings.ai_cache_enabled and provider in DEFAULT_MODELS:
+        model = model or DEFAULT_MODELS[provider]
+        key = cache_key(provider, model, "analyze", truncated_text)
+        cached = await ai_cache.get(key)
+        if cached is not None and (answer := _normalize_analysis(cached)) is not None:
+            return answer | {"provider": provider, "cached": True}
+    
     for attempt in range(MAX_RETRIES):
         try:
             if provider == "openai":
                 if not openai_key:
                     return {"error": "OpenAI API key not configured"}
-                result = await identify_with_openai(
+                result = await analyze_with_openai(
                     truncated_text, 
                     openai_key, 
                     model or "gpt-4o-mini"
@@ -347,13 +808,13 @@ async def identify_product(
             elif provider == "anthropic":
                 if not anthropic_key:
                     return {"error": "Anthropic API key not configured"}
-                result = await identify_with_anthropic(
+                result = await analyze_with_anthropic(
                     truncated_text, 
                     anthropic_key,
                     model or "claude-3-haiku-20240307"
                 )
             elif provider == "ollama":
-                result = await identify_with_ollama(
+                result = await analyze_with_ollama(
                     truncated_text, 
                     ollama_url, 
                     model or "gemma3:12b"
@@ -361,26 +822,343 @@ async def identify_product(
             else:
                 return {"error": f"Unknown provider: {provider}"}
             
-            result["provider"] = provider
-            return result
+            answer = _normalize_analysis(result)
+            if answer is None:
+                return {"error": "AI response is missing the metadata or tags object"}
+            if key is not None:
+                await ai_cache.set(key, provider, model, answer)
+            # Prompt cache usage describes this request, not the answer
+            answer["cached_tokens"] = result.get("cached_tokens", 0)
+            answer["provider"] = provider
+            return answer
             
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 429:
-                # Rate limit - wait and retry with exponential backoff
-                wait_time = INITIAL_BACKOFF * (2 ** attempt)
-                logger.warning(f"Rate limited (attempt {attempt + 1}/{MAX_RETRIES}), waiting {wait_time}s...")
+        except (httpx.HTTPStatusError, httpx.TransportError) as e:
+            if _is_retryable(e) and attempt < MAX_RETRIES - 1:
+                wait_time = _retry_delay(e, attempt)
+                logger.warning(
+                    f"{provider} request failed ({_describe_http_error(e)}, attempt "
+                    f"{attempt + 1}/{MAX_RETRIES}), retrying in {wait_time:.1f}s..."
+                )
                 await asyncio.sleep(wait_time)
-                last_error = e
                 continue
-            return {"error": f"API error: {e.response.status_code} - {e.response.text}"}
+            if isinstance(e, httpx.HTTPStatusError):
+                if e.response.status_code == 429:
+                    return {"error": f"Rate limit exceeded after {MAX_RETRIES} attempts"}
+                return {"error": f"API error: {e.response.status_code} - {e.response.text}"}
+            return {"error": f"Analysis failed: {str(e)}"}
         except json.JSONDecodeError as e:
             return {"error": f"Failed to parse AI response as JSON: {str(e)[:100]}"}
         except Exception as e:
-            return {"error": f"Identification failed: {str(e)}"}
+            return {"error": f"Analysis failed: {str(e)}"}
+
+
+_METADATA_FIELDS = frozenset(ANALYSIS_SCHEMA["properties"]["metadata"]["properties"])
+_TAG_FIELDS = frozenset(ANALYSIS_SCHEMA["properties"]["tags"]["properties"])
+
+
+def _normalize_analysis(result: Any) -> dict[str, Any] | None:
+    """
+    The {"metadata": ..., "tags": ...} answer in an analysis reply, or None.
+    
+    Replies that skipped the wrapper (Anthropic's text fallback, Ollama
+    builds that ignore the format schema) are accepted when their flat
+    fields belong to the schema; they are split between the two parts.
+    """
+    if not isinstance(result, dict):
+        return None
+    metadata, tags = result.get("metadata"), result.get("tags")
+    if metadata is None and tags is None:
+        metadata = {k: v for k, v in result.items() if k in _METADATA_FIELDS}
+        tags = {k: v for k, v in result.items() if k in _TAG_FIELDS}
+        if set(metadata) | set(tags) <= {"confidence"}:
+            return None
+    if not isinstance(metadata, dict) or not isinstance(tags, dict):
+        return None
+    return {"metadata": metadata, "tags": tags}
+
+
+def _analysis_part(analysis: dict[str, Any], part: str) -> dict[str, Any]:
+    """One half of an analyze_product result, shaped like the single-task calls."""
+    if "error" in analysis:
+        return analysis
+    result = dict(analysis[part])
+    result["provider"] = analysis["provider"]
+    return result
+
+
+async def identify_product(
+    text: str,
+    provider: str | None = None,
+    model: str | None = None,
+    use_cache: bool = True,
+) -> dict[str, Any]:
+    """
+    Identify product metadata using AI.
+    
+    Runs analyze_product, so the tag suggestions for the same text are cached
+    along the way and a following suggest_tags call costs nothing.
+    
+    Args:
+        text: Extracted text from the PDF
+        provider: AI provider to use ("openai", "anthropic", "ollama", or None for auto)
+        model: Specific model to use (optional)
+        use_cache: Return a stored response for an identical earlier request
+    
+    Returns:
+        Dictionary with identified metadata
+    """
+    return _analysis_part(await analyze_product(text, provider, model, use_cache), "metadata")
+
+
+# Batch APIs bill at half price but may take up to 24 hours; use them for
+# background re-identification, not interactive requests
+BATCH_POLL_INTERVAL = 30.0  # seconds between batch status checks
+BATCH_MIN_ITEMS = 50  # mode="auto" switches to a Batch API at this many texts
+OPENAI_BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+async def batch_identify_with_openai(
+    texts: list[str],
+    api_key: str,
+    model: str = "gpt-4o-mini",
+) -> list[dict[str, Any]]:
+    """Identify many texts through the OpenAI Batch API.
+    
+    Uploads one JSONL request file, waits for the batch to finish and returns
+    results in input order; failed items are returned as {"error": ...}.
+    """
+    client = get_ai_client()
+    headers = {"Authorization": f"Bearer {api_key}"}
+    
+    lines = [
+        json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _openai_identify_body(text, model),
+        })
+        for i, text in enumerate(texts)
+    ]
+    response = await client.post(
+        "https://api.openai.com/v1/files",
+        headers=headers,
+        data={"purpose": "batch"},
+        files={"file": ("batch.jsonl", "\n".join(lines).encode(), "application/jsonl")},
+    )
+    response.raise_for_status()
+    input_file_id = _loads(response.content)["id"]
+    
+    response = await client.post(
+        "https://api.openai.com/v1/batches",
+        headers=headers,
+        json={
+            "input_file_id": input_file_id,
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+        },
+    )
+    response.raise_for_status()
+    batch = _loads(response.content)
+    
+    while batch["status"] not in OPENAI_BATCH_FINAL_STATUSES:
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+        response = await client.get(
+            f"https://api.openai.com/v1/batches/{batch['id']}", headers=headers
+        )
+        response.raise_for_status()
+        batch = _loads(response.content)
+    
+    results: list[dict[str, Any]] = [
+        {"error": f"Batch {batch['status']} without a result"} for _ in texts
+    ]
+    if not batch.get("output_file_id"):
+        return results
+    
+    response = await client.get(
+        f"https://api.openai.com/v1/files/{batch['output_file_id']}/content",
+        headers=headers,
+    )
+    response.raise_for_status()
+    for line in response.text.splitlines():
+        if not line.strip():
+            continue
+        item = _loads(line)
+        index = int(item["custom_id"])
+        body = (item.get("response") or {}).get("body") or {}
+        try:
+            results[index] = _loads(body["choices"][0]["message"]["content"])
+        except (KeyError, IndexError, json.JSONDecodeError) as e:
+            error = item.get("error") or body.get("error") or str(e)
+            results[index] = {"error": f"Batch item failed: {error}"}
+    return results
+
+
+async def batch_identify_with_anthropic(
+    texts: list[str],
+    api_key: str,
+    model: str = "claude-3-haiku-20240307",
+) -> list[dict[str, Any]]:
+    """Identify many texts through the Anthropic Message Batches API.
+    
+    Returns results in input order; failed items are returned as {"error": ...}.
+    """
+    client = get_ai_client()
+    headers = {
+        "x-api-key": api_key,
+        "anthropic-version": "2023-06-01",
+    }
     
-    # All retries exhausted
-    if last_error:
-        return {"error": f"Rate limit exceeded after {MAX_RETRIES} retries"}
+    response = await client.post(
+        "https://api.anthropic.com/v1/messages/batches",
+        headers=headers,
+        json={
+            "requests": [
+                {"custom_id": str(i), "params": _anthropic_identify_params(text, model)}
+                for i, text in enumerate(texts)
+            ],
+        },
+    )
+    response.raise_for_status()
+    batch = _loads(response.content)
+    
+    while batch["processing_status"] != "ended":
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+        response = await client.get(
+            f"https://api.anthropic.com/v1/messages/batches/{batch['id']}", headers=headers
+        )
+        response.raise_for_status()
+        batch = _loads(response.content)
+    
+    results: list[dict[str, Any]] = [
+        {"error": "Batch ended without a result"} for _ in texts
+    ]
+    if not batch.get("results_url"):
+        return results
+    
+    response = await client.get(batch["results_url"], headers=headers)
+    response.raise_for_status()
+    for line in response.text.splitlines():
+        if not line.strip():
+            continue
+        item = _loads(line)
+        index = int(item["custom_id"])
+        result = item.get("result") or {}
+        if result.get("type") != "succeeded":
+            results[index] = {"error": f"Batch item {result.get('type', 'failed')}: {result.get('error')}"}
+            continue
+        try:
+            results[index] = _parse_anthropic_json(result["message"]["content"][0]["text"])
+        except (KeyError, IndexError, json.JSONDecodeError) as e:
+            results[index] = {"error": f"Failed to parse AI response as JSON: {str(e)[:100]}"}
+    return results
+
+
+async def identify_products_concurrent(
+    texts: list[str],
+    provider: str | None = None,
+    model: str | None = None,
+    max_concurrency: int | None = None,
+    use_cache: bool = True,
+) -> list[dict[str, Any]]:
+    """
+    Identify many products with up to max_concurrency requests in flight.
+    
+    All requests share the pooled HTTP client, so max_concurrency (default
+    settings.ai_concurrency) should not exceed settings.ai_max_connections;
+    beyond that, requests just queue for a connection.
+    
+    Returns:
+        One identification dict per text, in input order
+    """
+    semaphore = asyncio.Semaphore(max_concurrency or settings.ai_concurrency)
+    
+    async def identify_one(text: str) -> dict[str, Any]:
+        async with semaphore:
+            return await identify_product(text, provider, model, use_cache=use_cache)
+    
+    return await asyncio.gather(*(identify_one(text) for text in texts))
+
+
+async def identify_products(
+    texts: list[str],
+    provider: str | None = None,
+    model: str | None = None,
+    mode: str = "realtime",
+    use_cache: bool = True,
+) -> list[dict[str, Any]]:
+    """
+    Identify many products, in input order.
+    
+    Args:
+        texts: Extracted text of each PDF
+        provider: AI provider to use ("openai", "anthropic", "ollama", or None for auto)
+        model: Specific model to use (optional)
+        mode: "realtime" for one request per text, "batch" to submit all
+            uncached texts through the provider's Batch API (half price, up to
+            24h turnaround; Ollama always runs in realtime), or "auto" to
+            batch from BATCH_MIN_ITEMS texts upwards
+        use_cache: Reuse and store responses in the AI response cache
+    
+    Returns:
+        One identification dict per text
+    """
+    if mode not in ("realtime", "batch", "auto"):
+        raise ValueError(f"Unknown mode: {mode}")
+    if mode == "auto":
+        mode = "batch" if len(texts) >= BATCH_MIN_ITEMS else "realtime"
+    
+    openai_key = os.getenv("OPENAI_API_KEY", "") or await get_setting_from_db("openai_api_key")
+    anthropic_key = os.getenv("ANTHROPIC_API_KEY", "") or await get_setting_from_db("anthropic_api_key")
+    
+    if provider is None:
+        if openai_key:
+            provider = "openai"
+        elif anthropic_key:
+            provider = "anthropic"
+        else:
+            provider = "ollama"
+    
+    if mode == "realtime" or provider not in ("openai", "anthropic"):
+        return await identify_products_concurrent(texts, provider, model, use_cache=use_cache)
+    
+    api_key = openai_key if provider == "openai" else anthropic_key
+    if not api_key:
+        error = {"error": f"{provider.capitalize()} API key not configured"}
+        return [dict(error) for _ in texts]
+    
+    model = model or DEFAULT_MODELS[provider]
+    truncated = [build_identification_context(text) for text in texts]
+    results: list[dict[str, Any] | None] = [None] * len(texts)
+    
+    # Only submit what isn't cached already
+    keys = [cache_key(provider, model, "identify", text) for text in truncated]
+    if use_cache and settings.ai_cache_enabled:
+        for i, key in enumerate(keys):
+            if (cached := await ai_cache.get(key)) is not None:
+                results[i] = cached | {"provider": provider}
+    pending = [i for i, result in enumerate(results) if result is None]
+    
+    if pending:
+        batch_identify = (
+            batch_identify_with_openai if provider == "openai" else batch_identify_with_anthropic
+        )
+        try:
+            batch_results = await batch_identify([truncated[i] for i in pending], api_key, model)
+        except httpx.HTTPStatusError as e:
+            error = {"error": f"API error: {e.response.status_code} - {e.response.text}"}
+            batch_results = [dict(error) for _ in pending]
+        except Exception as e:
+            error = {"error": f"Identification failed: {str(e)}"}
+            batch_results = [dict(error) for _ in pending]
+        
+        for i, result in zip(pending, batch_results):
+            if "error" not in result:
+                if use_cache and settings.ai_cache_enabled:
+                    await ai_cache.set(keys[i], provider, model, result)
+                result["provider"] = provider
+            results[i] = result
+    
+    return results
 
 
 def check_ollama_available(ollama_url: str | None = None) -> bool:
@@ -410,148 +1188,28 @@ def get_available_providers() -> dict[str, bool]:
     }
 
 
-async def suggest_tags_with_openai(text: str, api_key: str, model: str = "gpt-4o-mini") -> dict[str, Any]:
-    """Use OpenAI API for tag suggestions."""
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": model,
-                "messages": [
-                    {"role": "user", "content": TAG_SUGGESTION_PROMPT.format(text=text)}
-                ],
-                "temperature": 0.3,
-                "response_format": {"type": "json_object"},
-            },
-        )
-        response.raise_for_status()
-        data = response.json()
-        content = data["choices"][0]["message"]["content"]
-        return json.loads(content)
-
-
-async def suggest_tags_with_anthropic(text: str, api_key: str, model: str = "claude-3-haiku-20240307") -> dict[str, Any]:
-    """Use Anthropic API for tag suggestions."""
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "x-api-key": api_key,
-                "Content-Type": "application/json",
-                "anthropic-version": "2023-06-01",
-            },
-            json={
-                "model": model,
-                "max_tokens": 1024,
-                "messages": [
-                    {"role": "user", "content": TAG_SUGGESTION_PROMPT.format(text=text)}
-                ],
-            },
-        )
-        response.raise_for_status()
-        data = response.json()
-        content = data["content"][0]["text"].strip()
-        
-        start_idx = content.find('{')
-        end_idx = content.rfind('}')
-        
-        if start_idx != -1 and end_idx != -1:
-            json_str = content[start_idx:end_idx + 1]
-            return json.loads(json_str)
-        
-        return json.loads(content)
-
-
-async def suggest_tags_with_ollama(text: str, base_url: str, model: str = "gemma3:12b") -> dict[str, Any]:
-    """Use Ollama for local tag suggestions."""
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        response = await client.post(
-            f"{base_url}/api/generate",
-            json={
-                "model": model,
-                "prompt": TAG_SUGGESTION_PROMPT.format(text=text),
-                "stream": False,
-                "format": "json",
-            },
-        )
-        response.raise_for_status()
-        data = response.json()
-        content = data["response"]
-        return json.loads(content)
-
-
 async def suggest_tags(
     text: str,
     provider: str | None = None,
     model: str | None = None,
+    use_cache: bool = True,
 ) -> dict[str, Any]:
     """
     Suggest tags for a product using AI.
     
+    Runs analyze_product, sharing its request and cache entry with
+    identify_product.
+    
     Args:
         text: Extracted text from the PDF
         provider: AI provider to use ("openai", "anthropic", "ollama", or None for auto)
         model: Specific model to use (optional)
+        use_cache: Return a stored response for an identical earlier request
     
     Returns:
         Dictionary with suggested tags by category
     """
-    truncated_text = text[:4000]
-    
-    # Check env vars first, then database settings
-    openai_key = os.getenv("OPENAI_API_KEY", "") or await get_setting_from_db("openai_api_key")
-    anthropic_key = os.getenv("ANTHROPIC_API_KEY", "") or await get_setting_from_db("anthropic_api_key")
-    ollama_url = await get_ollama_url()
-    
-    if provider is None:
-        if openai_key:
-            provider = "openai"
-        elif anthropic_key:
-            provider = "anthropic"
-        elif ollama_url:
-            provider = "ollama"
-        else:
-            return {"error": "No AI provider configured"}
-    
-    try:
-        if provider == "openai":
-            if not openai_key:
-                return {"error": "OpenAI API key not configured"}
-            result = await suggest_tags_with_openai(
-                truncated_text, 
-                openai_key,
-                model or "gpt-4o-mini"
-            )
-        elif provider == "anthropic":
-            if not anthropic_key:
-                return {"error": "Anthropic API key not configured"}
-            result = await suggest_tags_with_anthropic(
-                truncated_text, 
-                anthropic_key,
-                model or "claude-3-haiku-20240307"
-            )
-        elif provider == "ollama":
-            result = await suggest_tags_with_ollama(
-                truncated_text, 
-                ollama_url, 
-                model or "gemma3:12b"
-            )
-        else:
-            return {"error": f"Unknown provider: {provider}"}
-        
-        result["provider"] = provider
-        return result
-        
-    except httpx.HTTPStatusError as e:
-        return {"error": f"API error: {e.response.status_code} - {e.response.text}"}
-    except json.JSONDecodeError as e:
-        return {"error": f"Failed to parse AI response as JSON: {str(e)[:100]}"}
-    except Exception as e:
-        return {"error": f"Tag suggestion failed: {str(e)}"}
+    return _analysis_part(await analyze_product(text, provider, model, use_cache), "tags")
 
 
 def flatten_suggested_tags(suggestions: dict[str, Any]) -> list[str]:
@@ -0,0 +1,67 @@
+"""Shared process pool for CPU-bound, page-parallel PDF processing."""
+
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def parallel_workers() -> int:
+    """Number of worker processes to use; below 2 callers should stay serial."""
+    return os.cpu_count() or 1
+
+
+def page_ranges(first: int, stop: int, workers: int) -> list[tuple[int, int]]:
+    """Split pages [first, stop) into contiguous half-open ranges, a few per worker."""
+    step = -(-(stop - first) // (workers * 2))
+    return [(page, min(page + step, stop)) for page in range(first, stop, step)]
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the module-level pool, creating it on first use.
+
+    Workers are spawned rather than forked so they never inherit the API
+    server, and the pool is kept so later calls skip interpreter startup.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=parallel_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def process_map(func: Callable[[Any], Any], jobs: Iterable[Any]) -> Iterator[Any]:
+    """Map a picklable module-level function over jobs, yielding results in order."""
+    pool = _get_pool()
+    try:
+        yield from pool.map(func, jobs)
+    except BrokenProcessPool:
+        # A crashed worker poisons the pool; let the next call build a new one
+        _discard_pool(pool)
+        raise
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_process_pool() -> None:
+    """Stop the shared pool's workers. Call on application shutdown."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
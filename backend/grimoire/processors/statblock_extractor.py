@@ -4,12 +4,15 @@ Detects monster/NPC stat blocks for various TTRPG systems.
 """
 
 import re
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 import pdfplumber
 
+from grimoire.processors.parallel import page_ranges, parallel_workers, process_map
+
 
 @dataclass
 class StatBlock:
@@ -30,6 +33,9 @@ class StatBlock:
         }
 
 
+# One "10 (+0)" ability score and modifier, capturing the score
+_ABILITY_SCORE = r'(\d{1,2})\s*\([+-]?\d+\)'
+
 # D&D 5e stat block patterns
 PATTERNS_5E = {
     "header": re.compile(r'^([A-Z][A-Za-z\s\'\-]+)\s*$'),
@@ -38,7 +44,8 @@ PATTERNS_5E = {
     "hit_points": re.compile(r'Hit Points\s*(\d+)\s*\(([^)]+)\)', re.IGNORECASE),
     "speed": re.compile(r'Speed\s*(\d+\s*ft\.?)', re.IGNORECASE),
     "abilities": re.compile(r'STR\s+DEX\s+CON\s+INT\s+WIS\s+CHA', re.IGNORECASE),
-    "ability_scores": re.compile(r'(\d{1,2})\s*\([+-]?\d+\)\s*(\d{1,2})\s*\([+-]?\d+\)\s*(\d{1,2})\s*\([+-]?\d+\)\s*(\d{1,2})\s*\([+-]?\d+\)\s*(\d{1,2})\s*\([+-]?\d+\)\s*(\d{1,2})\s*\([+-]?\d+\)'),
+    # Six consecutive "score (modifier)" pairs, matched in one search
+    "ability_scores": re.compile(r'\s*'.join([_ABILITY_SCORE] * 6)),
     "challenge": re.compile(r'Challenge\s*(\d+(?:/\d+)?)\s*\(([^)]+)\s*XP\)', re.IGNORECASE),
     "actions": re.compile(r'^Actions$', re.IGNORECASE | re.MULTILINE),
 }
@@ -67,24 +74,49 @@ PATTERNS_OSR = {
     "morale": re.compile(r'(?:Morale|ML)[:\s]*(\d+)', re.IGNORECASE),
 }
 
+# System detection indicators, matched against lowercased text
+_RE_CREATURE_LEVEL = re.compile(r'creature\s+\d+')
+_RE_THAC0 = re.compile(r'\bthac0\b')
+_RE_MORALE = re.compile(r'\bmorale\b')
+_RE_HD = re.compile(r'\bhd\b')
+
+
+# Whole-page versions of the stat block start checks in is_statblock_start.
+# These find the few candidate lines in one pass over the page text, and the
+# per-line patterns then only run on those. Whitespace inside a line is
+# spelled out as every \s character except the newline.
+_LINE_SPACE = r'\t\x0b-\x0d\x1c-\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000'
+_PAGE_SIZE_TYPE_5E = re.compile(
+    rf'^(?:Tiny|Small|Medium|Large|Huge|Gargantuan)[{_LINE_SPACE}]+(?:aberration|beast|celestial|construct|dragon|elemental|fey|fiend|giant|humanoid|monstrosity|ooze|plant|undead)',
+    re.IGNORECASE | re.MULTILINE,
+)
+_PAGE_CREATURE_LEVEL = re.compile(rf'Creature[{_LINE_SPACE}]+\d', re.IGNORECASE)
+
 
 def detect_system(text: str) -> str:
-    """Detect which game system a stat block belongs to."""
+    """Detect which game system a stat block belongs to.
+
+    Each regex only runs once a plain substring test has found the keyword
+    it looks for, so most blocks are classified without a regex scan.
+    """
     text_lower = text.lower()
 
     # 5e indicators
     if 'challenge' in text_lower and 'xp)' in text_lower:
-        if re.search(PATTERNS_5E["abilities"], text):
+        if PATTERNS_5E["abilities"].search(text):
             return "5e"
 
     # PF2e indicators
-    if re.search(r'creature\s+\d+', text_lower):
-        if 'perception' in text_lower and 'strike' in text_lower:
+    if 'perception' in text_lower and 'strike' in text_lower and 'creature' in text_lower:
+        if _RE_CREATURE_LEVEL.search(text_lower):
             return "pf2e"
 
     # OSR indicators
-    if re.search(r'\bthac0\b', text_lower) or re.search(r'\bmorale\b', text_lower):
-        if re.search(r'\bhd\b', text_lower):
+    if (
+        ('thac0' in text_lower and _RE_THAC0.search(text_lower))
+        or ('morale' in text_lower and _RE_MORALE.search(text_lower))
+    ):
+        if 'hd' in text_lower and _RE_HD.search(text_lower):
             return "osr"
 
     # Generic D&D-like
@@ -202,12 +234,17 @@ def parse_osr_statblock(text: str, name: str) -> dict[str, Any]:
 
 def is_statblock_start(line: str, next_lines: list[str]) -> tuple[bool, str | None]:
     """Check if a line starts a stat block."""
-    line = line.strip()
+    return is_statblock_start_at([line, *next_lines], 0)
+
+
+def is_statblock_start_at(lines: list[str], i: int) -> tuple[bool, str | None]:
+    """Check if lines[i] starts a stat block, looking ahead in place."""
+    line = lines[i].strip()
 
     # Check for 5e style header followed by size/type
     if PATTERNS_5E["header"].match(line):
-        for next_line in next_lines[:3]:
-            if PATTERNS_5E["size_type"].search(next_line):
+        for j in range(i + 1, min(i + 4, len(lines))):
+            if PATTERNS_5E["size_type"].search(lines[j]):
                 return True, line
 
     # Check for PF2e style header
@@ -218,8 +255,48 @@ def is_statblock_start(line: str, next_lines: list[str]) -> tuple[bool, str | No
     return False, None
 
 
-def extract_statblock_text(lines: list[str], start_idx: int) -> tuple[str, int]:
-    """Extract the full text of a stat block starting at start_idx."""
+def find_statblock_starts(text: str, lines: list[str]) -> dict[int, str]:
+    """
+    Map the index of every line that starts a stat block to its name.
+
+    Gives the same answers as calling is_statblock_start on each line with
+    the three lines after it, but with one regex pass over the page per
+    pattern instead of several per line. ``lines`` must be text.split('\n').
+    """
+    def line_indices(pattern: re.Pattern) -> Iterator[tuple[int, re.Match]]:
+        # Matches come in order, so count newlines since the previous one
+        line_idx = pos = 0
+        for match in pattern.finditer(text):
+            line_idx += text.count('\n', pos, match.start())
+            pos = match.start()
+            yield line_idx, match
+
+    starts = {}
+    # A 5e header needs a size/type line within the next three, so only the
+    # few lines before each of those are candidates
+    for j, _ in line_indices(_PAGE_SIZE_TYPE_5E):
+        for i in range(max(j - 3, 0), j):
+            if i not in starts and PATTERNS_5E["header"].match(lines[i].strip()):
+                starts[i] = lines[i].strip()
+    # A PF2e header always contains "Creature <level>"
+    for i, _ in line_indices(_PAGE_CREATURE_LEVEL):
+        if i not in starts:
+            match = PATTERNS_PF2E["header"].match(lines[i].strip())
+            if match:
+                starts[i] = match.group(1)
+    return starts
+
+
+def extract_statblock_text(
+    lines: list[str],
+    start_idx: int,
+    starts: dict[int, str] | None = None,
+) -> tuple[str, int]:
+    """Extract the full text of a stat block starting at start_idx.
+
+    ``starts`` is find_statblock_starts' result for the same lines; when
+    given, the next stat block header is looked up instead of re-detected.
+    """
     text_lines = []
     end_idx = start_idx
 
@@ -231,7 +308,10 @@ def extract_statblock_text(lines: list[str], start_idx: int) -> tuple[str, int]:
         if i > start_idx + 5:  # After initial lines
             # New stat block header
             if i + 3 < len(lines):
-                is_new, _ = is_statblock_start(line, lines[i+1:i+4])
+                if starts is not None:
+                    is_new = i in starts
+                else:
+                    is_new, _ = is_statblock_start_at(lines, i)
                 if is_new:
                     break
 
@@ -245,83 +325,145 @@ def extract_statblock_text(lines: list[str], start_idx: int) -> tuple[str, int]:
     return '\n'.join(text_lines), end_idx
 
 
+# The shortest text is_statblock_start can accept is a one-letter 5e name
+# plus "Tiny fey"; pages with fewer characters than that can't start a block
+_MIN_PAGE_CHARS = 8
+
+
 def extract_statblocks_from_page(page, page_num: int) -> list[StatBlock]:
     """Extract stat blocks from a single page."""
     statblocks = []
+
+    # Scanned or purely graphical pages: skip text layout entirely.
+    # page.chars is parsed once and reused by extract_text.
+    if len(page.chars) < _MIN_PAGE_CHARS:
+        return statblocks
+
     text = page.extract_text()
 
     if not text:
         return statblocks
 
     lines = text.split('\n')
-    i = 0
-
-    while i < len(lines):
-        line = lines[i]
-        next_lines = lines[i+1:i+5] if i + 1 < len(lines) else []
-
-        is_start, name = is_statblock_start(line, next_lines)
-
-        if is_start and name:
-            block_text, end_idx = extract_statblock_text(lines, i)
-            system = detect_system(block_text)
-
-            # Parse based on system
-            if system == "5e":
-                attrs = parse_5e_statblock(block_text, name)
-            elif system == "pf2e":
-                attrs = parse_pf2e_statblock(block_text, name)
-            elif system == "osr":
-                attrs = parse_osr_statblock(block_text, name)
-            else:
-                attrs = {"name": name}
-
-            statblocks.append(StatBlock(
-                name=name,
-                system=system,
-                raw_text=block_text,
-                page=page_num,
-                attributes=attrs,
-            ))
-
-            i = end_idx + 1
+    starts = find_statblock_starts(text, lines)
+    next_idx = 0
+
+    # Lines inside a block already extracted can't start another one
+    for i in sorted(starts):
+        if i < next_idx:
+            continue
+        name = starts[i]
+
+        block_text, end_idx = extract_statblock_text(lines, i, starts)
+        system = detect_system(block_text)
+
+        # Parse based on system
+        if system == "5e":
+            attrs = parse_5e_statblock(block_text, name)
+        elif system == "pf2e":
+            attrs = parse_pf2e_statblock(block_text, name)
+        elif system == "osr":
+            attrs = parse_osr_statblock(block_text, name)
         else:
-            i += 1
+            attrs = {"name": name}
+
+        statblocks.append(StatBlock(
+            name=name,
+            system=system,
+            raw_text=block_text,
+            page=page_num,
+            attributes=attrs,
+        ))
+
+        next_idx = end_idx + 1
 
     return statblocks
 
 
-def extract_statblocks_from_pdf(
+# Pages parse in ~17 ms each, and a warm pool adds ~0.1 s per call (every range
+# reopens the PDF), so two workers only win from about a dozen pages up
+_PARALLEL_PAGE_THRESHOLD = 16
+
+
+# Document-level caches are dropped this often on long page ranges
+_PDF_FLUSH_PAGES = 500
+
+
+def _extract_page_range(job: tuple[str, int, int]) -> list[StatBlock]:
+    """Extract stat blocks from pages [first, last] (1-indexed) in a worker process.
+
+    Opens its own pdfplumber handle limited to those pages.
+    """
+    pdf_path, first, last = job
+    statblocks = []
+    with pdfplumber.open(pdf_path, pages=range(first, last + 1)) as pdf:
+        for count, page in enumerate(pdf.pages, 1):
+            statblocks.extend(extract_statblocks_from_page(page, page.page_number))
+            page.flush_cache()
+            if count % _PDF_FLUSH_PAGES == 0:
+                pdf.flush_cache()
+    return statblocks
+
+
+def iter_statblocks_from_pdf(
     pdf_path: str | Path,
     start_page: int = 1,
     end_page: int | None = None,
     system_hint: str | None = None,
-) -> list[StatBlock]:
+) -> Iterator[StatBlock]:
     """
-    Extract all stat blocks from a PDF.
+    Yield the stat blocks of a PDF in page order.
+
+    Each page's parsed layout objects are released once its blocks are
+    found, so memory stays bounded on very long books, and consumers that
+    handle one block at a time don't hold the whole result either.
 
     Args:
         pdf_path: Path to the PDF file
         start_page: Starting page (1-indexed)
         end_page: Ending page (1-indexed), None for all
         system_hint: Hint for which system to expect
-
-    Returns:
-        List of detected StatBlock objects
     """
-    statblocks = []
-
+    workers = parallel_workers()
     with pdfplumber.open(str(pdf_path)) as pdf:
         total_pages = len(pdf.pages)
         if end_page is None:
             end_page = total_pages
+        first, last = start_page, min(end_page, total_pages)
 
-        for page_num in range(start_page - 1, min(end_page, total_pages)):
-            page = pdf.pages[page_num]
-            page_blocks = extract_statblocks_from_page(page, page_num + 1)
-            statblocks.extend(page_blocks)
+        if workers < 2 or last - first + 1 < _PARALLEL_PAGE_THRESHOLD:
+            for page_num in range(first - 1, last):
+                page = pdf.pages[page_num]
+                yield from extract_statblocks_from_page(page, page_num + 1)
+                page.flush_cache()
+            return
 
-    return statblocks
+    # Text extraction is CPU-bound and pages are independent; split them into
+    # contiguous ranges, a few per worker, results kept in page order
+    jobs = [
+        (str(pdf_path), page, stop - 1)
+        for page, stop in page_ranges(first, last + 1, workers)
+    ]
+    for page_blocks in process_map(_extract_page_range, jobs):
+        yield from page_blocks
+
+
+def extract_statblocks_from_pdf(
+    pdf_path: str | Path,
+    start_page: int = 1,
+    end_page: int | None = None,
+    system_hint: str | None = None,
+) -> list[StatBlock]:
+    """
+    Extract all stat blocks from a PDF.
+
+    See iter_statblocks_from_pdf for the arguments; prefer it when the
+    blocks don't all need to be in memory at once.
+
+    Returns:
+        List of detected StatBlock objects
+    """
+    return list(iter_statblocks_from_pdf(pdf_path, start_page, end_page, system_hint))
 
 
 def statblocks_to_json(statblocks: list[StatBlock]) -> list[dict]:
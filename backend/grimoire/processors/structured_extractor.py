@@ -3,13 +3,19 @@ Structured content extraction using AI.
 Extracts monsters, spells, items, and other TTRPG content into structured JSON.
 """
 
+import asyncio
+import functools
 import json
+import logging
 import os
 from pathlib import Path
 from typing import Any
 
 import httpx
 
+from grimoire.config import settings
+from grimoire.processors.ai_cache import ai_cache, cache_key
+from grimoire.processors.ai_identifier import get_ai_client
 from grimoire.schemas.ttrpg import (
     Monster,
     Spell,
@@ -19,6 +25,23 @@ from grimoire.schemas.ttrpg import (
     ExtractedContent,
 )
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+# Characters of source text sent per extraction request. Slicing a shorter
+# string returns the string itself, so short texts are never copied.
+MAX_EXTRACTION_CHARS = 15000
+
+# Extraction prompts carry up to MAX_EXTRACTION_CHARS of text and ask for
+# long JSON answers
+EXTRACTION_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
 
 MONSTER_EXTRACTION_PROMPT = """Extract monster/creature stat blocks from this text into structured JSON.
 
@@ -99,6 +122,80 @@ Text to extract from:
 Return ONLY valid JSON."""
 
 
+ALL_CONTENT_EXTRACTION_PROMPT = """Extract monsters, spells, magic items and NPCs from this text into structured JSON.
+
+For each monster/creature stat block found, extract:
+- name, size, creature_type, alignment
+- armor_class, armor_type, hit_points, hit_dice
+- speed (as object with walk, fly, swim, etc.)
+- abilities (strength, dexterity, constitution, intelligence, wisdom, charisma)
+- saving_throws, skills (as objects with ability/skill name and modifier)
+- damage_vulnerabilities, damage_resistances, damage_immunities, condition_immunities (as arrays)
+- senses, languages
+- challenge_rating, experience_points
+- traits (array of {name, description})
+- actions (array of {name, description, attack if applicable})
+- bonus_actions, reactions, legendary_actions (same format as actions)
+
+For each spell found, extract:
+- name, level (0 for cantrips), school, ritual (boolean)
+- casting_time, range, duration, concentration (boolean)
+- components: {verbal, somatic, material, material_description, material_cost, material_consumed}
+- description, higher_levels (at higher levels text)
+- classes, subclasses (arrays)
+- damage if applicable: {dice, damage_type, average}
+- save (ability for saving throw)
+
+For each magic item found, extract:
+- name, rarity (common/uncommon/rare/very rare/legendary/artifact)
+- item_type (weapon, armor, wondrous item, etc.)
+- requires_attunement (boolean), attunement_requirements
+- description, properties (array)
+- charges, recharge
+
+For each NPC (non-player character) found, extract:
+- name, role (shopkeeper, quest giver, villain, etc.)
+- race, occupation, location
+- description (physical appearance)
+- personality, motivation, secret
+
+Return a JSON object with "monsters", "spells", "magic_items" and "npcs" arrays.
+Use an empty array for any kind of content that is not found, e.g.
+{"monsters": [], "spells": [], "magic_items": [], "npcs": []}.
+
+Text to extract from:
+{text}
+
+Return ONLY valid JSON."""
+
+
+def _loads(data: str | bytes) -> Any:
+    """Parse JSON with orjson when installed; its errors subclass json.JSONDecodeError."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+ALL_CONTENT_KEYS = ("monsters", "spells", "magic_items", "npcs")
+
+
+@functools.lru_cache(maxsize=16)
+def _split_prompt(prompt_template: str) -> tuple[str, str]:
+    """Text before and after a template's {text} placeholder."""
+    prefix, _, suffix = prompt_template.partition("{text}")
+    return prefix, suffix
+
+
+def _render_prompt(prompt_template: str, text: str) -> str:
+    """
+    Fill a prompt template's {text} placeholder with the (truncated) text.
+
+    Plain concatenation rather than str.format: the templates contain
+    literal JSON braces, and nothing but {text} is substituted.
+    """
+    prefix, suffix = _split_prompt(prompt_template)
+    return prefix + text[:MAX_EXTRACTION_CHARS] + suffix
+
+
 async def extract_with_openai(
     text: str,
     prompt_template: str,
@@ -106,26 +203,29 @@ async def extract_with_openai(
     model: str = "gpt-4o-mini",
 ) -> dict:
     """Extract structured content using OpenAI."""
-    prompt = prompt_template.format(text=text[:15000])  # Limit text length
+    prompt = _render_prompt(prompt_template, text)
     
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": model,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.1,
-                "response_format": {"type": "json_object"},
-            },
-        )
-        response.raise_for_status()
-        data = response.json()
-        content = data["choices"][0]["message"]["content"]
-        return json.loads(content)
+    client = get_ai_client()
+    response = await client.post(
+        "https://api.openai.com/v1/chat/completions",
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        },
+        json={
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.1,
+            "response_format": {"type": "json_object"},
+        },
+        timeout=EXTRACTION_TIMEOUT,
+    )
+    response.raise_for_status()
+    data = _loads(response.content)
+    choice = data["choices"][0]
+    if choice.get("finish_reason") == "length":
+        raise ValueError("Extraction response was cut off at the token limit")
+    return _loads(choice["message"]["content"])
 
 
 async def extract_with_anthropic(
@@ -135,40 +235,53 @@ async def extract_with_anthropic(
     model: str = "claude-3-haiku-20240307",
 ) -> dict:
     """Extract structured content using Anthropic."""
-    prompt = prompt_template.format(text=text[:15000])
+    prompt = _render_prompt(prompt_template, text)
     
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        response = await client.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "x-api-key": api_key,
-                "Content-Type": "application/json",
-                "anthropic-version": "2023-06-01",
-            },
-            json={
-                "model": model,
-                "max_tokens": 4096,
-                "messages": [{"role": "user", "content": prompt}],
-            },
-        )
-        response.raise_for_status()
-        data = response.json()
-        content = data["content"][0]["text"].strip()
-        
-        # Extract JSON from response
-        start = content.find('{')
-        end = content.rfind('}')
-        if start != -1 and end != -1:
-            return json.loads(content[start:end + 1])
-        return {}
+    client = get_ai_client()
+    response = await client.post(
+        "https://api.anthropic.com/v1/messages",
+        headers={
+            "x-api-key": api_key,
+            "Content-Type": "application/json",
+            "anthropic-version": "2023-06-01",
+        },
+        json={
+            "model": model,
+            "max_tokens": 4096,
+            "messages": [{"role": "user", "content": prompt}],
+        },
+        timeout=EXTRACTION_TIMEOUT,
+    )
+    response.raise_for_status()
+    data = _loads(response.content)
+    if data.get("stop_reason") == "max_tokens":
+        # Brace extraction could still parse a prefix of the JSON
+        raise ValueError("Extraction response was cut off at the token limit")
+    content = data["content"][0]["text"].strip()
+    
+    # Extract JSON from response
+    start = content.find('{')
+    end = content.rfind('}')
+    if start != -1 and end != -1:
+        return _loads(content[start:end + 1])
+    return {}
 
 
-async def extract_monsters(
+async def _run_extraction(
+    task: str,
+    prompt_template: str,
     text: str,
-    provider: str | None = None,
-    model: str | None = None,
-) -> list[dict]:
-    """Extract monster stat blocks from text."""
+    provider: str | None,
+    model: str | None,
+    result_keys: tuple[str, ...] = (),
+) -> dict:
+    """
+    Run one extraction prompt, reusing a cached response for the same
+    provider, model, task and source text.
+    
+    Raises ValueError, without caching, when the response was truncated or
+    any of result_keys holds something other than an array.
+    """
     openai_key = os.getenv("OPENAI_API_KEY", "")
     anthropic_key = os.getenv("ANTHROPIC_API_KEY", "")
     
@@ -176,16 +289,41 @@ async def extract_monsters(
         provider = "anthropic" if anthropic_key else "openai" if openai_key else None
     
     if provider == "openai" and openai_key:
-        result = await extract_with_openai(
-            text, MONSTER_EXTRACTION_PROMPT, openai_key, model or "gpt-4o-mini"
-        )
+        model = model or "gpt-4o-mini"
     elif provider == "anthropic" and anthropic_key:
-        result = await extract_with_anthropic(
-            text, MONSTER_EXTRACTION_PROMPT, anthropic_key, model or "claude-3-haiku-20240307"
-        )
+        model = model or "claude-3-haiku-20240307"
     else:
-        return []
+        return {}
+    
+    key = None
+    if settings.ai_cache_enabled:
+        key = cache_key(provider, model, f"extract:{task}", text[:MAX_EXTRACTION_CHARS])
+        if (cached := await ai_cache.get(key)) is not None:
+            return cached
     
+    if provider == "openai":
+        result = await extract_with_openai(text, prompt_template, openai_key, model)
+    else:
+        result = await extract_with_anthropic(text, prompt_template, anthropic_key, model)
+    
+    if not isinstance(result, dict):
+        raise ValueError("Extraction response is not a JSON object")
+    for result_key in result_keys:
+        if not isinstance(result.get(result_key, []), list | None):
+            raise ValueError(f"Extraction response has no {result_key} array")
+    
+    if key is not None and result:
+        await ai_cache.set(key, provider, model, result)
+    return result
+
+
+async def extract_monsters(
+    text: str,
+    provider: str | None = None,
+    model: str | None = None,
+) -> list[dict]:
+    """Extract monster stat blocks from text."""
+    result = await _run_extraction("monsters", MONSTER_EXTRACTION_PROMPT, text, provider, model)
     return result.get("monsters", [])
 
 
@@ -195,23 +333,7 @@ async def extract_spells(
     model: str | None = None,
 ) -> list[dict]:
     """Extract spell definitions from text."""
-    openai_key = os.getenv("OPENAI_API_KEY", "")
-    anthropic_key = os.getenv("ANTHROPIC_API_KEY", "")
-    
-    if provider is None:
-        provider = "anthropic" if anthropic_key else "openai" if openai_key else None
-    
-    if provider == "openai" and openai_key:
-        result = await extract_with_openai(
-            text, SPELL_EXTRACTION_PROMPT, openai_key, model or "gpt-4o-mini"
-        )
-    elif provider == "anthropic" and anthropic_key:
-        result = await extract_with_anthropic(
-            text, SPELL_EXTRACTION_PROMPT, anthropic_key, model or "claude-3-haiku-20240307"
-        )
-    else:
-        return []
-    
+    result = await _run_extraction("spells", SPELL_EXTRACTION_PROMPT, text, provider, model)
     return result.get("spells", [])
 
 
@@ -221,23 +343,7 @@ async def extract_magic_items(
     model: str | None = None,
 ) -> list[dict]:
     """Extract magic item definitions from text."""
-    openai_key = os.getenv("OPENAI_API_KEY", "")
-    anthropic_key = os.getenv("ANTHROPIC_API_KEY", "")
-    
-    if provider is None:
-        provider = "anthropic" if anthropic_key else "openai" if openai_key else None
-    
-    if provider == "openai" and openai_key:
-        result = await extract_with_openai(
-            text, MAGIC_ITEM_PROMPT, openai_key, model or "gpt-4o-mini"
-        )
-    elif provider == "anthropic" and anthropic_key:
-        result = await extract_with_anthropic(
-            text, MAGIC_ITEM_PROMPT, anthropic_key, model or "claude-3-haiku-20240307"
-        )
-    else:
-        return []
-    
+    result = await _run_extraction("magic_items", MAGIC_ITEM_PROMPT, text, provider, model)
     return result.get("magic_items", [])
 
 
@@ -247,23 +353,7 @@ async def extract_npcs(
     model: str | None = None,
 ) -> list[dict]:
     """Extract NPC definitions from text."""
-    openai_key = os.getenv("OPENAI_API_KEY", "")
-    anthropic_key = os.getenv("ANTHROPIC_API_KEY", "")
-    
-    if provider is None:
-        provider = "anthropic" if anthropic_key else "openai" if openai_key else None
-    
-    if provider == "openai" and openai_key:
-        result = await extract_with_openai(
-            text, NPC_EXTRACTION_PROMPT, openai_key, model or "gpt-4o-mini"
-        )
-    elif provider == "anthropic" and anthropic_key:
-        result = await extract_with_anthropic(
-            text, NPC_EXTRACTION_PROMPT, anthropic_key, model or "claude-3-haiku-20240307"
-        )
-    else:
-        return []
-    
+    result = await _run_extraction("npcs", NPC_EXTRACTION_PROMPT, text, provider, model)
     return result.get("npcs", [])
 
 
@@ -279,6 +369,10 @@ async def extract_all_content(
     """
     Extract all structured content from text.
     
+    With every kind of content selected, this is a single request using
+    ALL_CONTENT_EXTRACTION_PROMPT; otherwise the selected extractions run
+    concurrently.
+    
     Args:
         text: The text to extract from
         provider: AI provider (openai, anthropic)
@@ -300,20 +394,36 @@ async def extract_all_content(
     
     content = ExtractedContent()
     
-    if extract_monsters:
-        monsters = await do_extract_monsters(text, provider, model)
-        content.monsters = [Monster(**m) for m in monsters if m]
-    
-    if extract_spells:
-        spells = await do_extract_spells(text, provider, model)
-        content.spells = [Spell(**s) for s in spells if s]
+    results = None
+    if extract_monsters and extract_spells and extract_items and extract_npcs:
+        # One request returns every kind of content, sending the text once.
+        # All four share that response's token budget, so a dense text can
+        # run out of room; then fall back to one request per type.
+        try:
+            results = await _run_extraction(
+                "all", ALL_CONTENT_EXTRACTION_PROMPT, text, provider, model,
+                ALL_CONTENT_KEYS,
+            )
+        except (ValueError, KeyError, IndexError) as e:
+            logger.warning(f"Combined extraction failed, extracting per type: {e}")
     
-    if extract_items:
-        items = await do_extract_items(text, provider, model)
-        content.magic_items = [MagicItem(**i) for i in items if i]
+    if results is None:
+        # The extractions are independent requests, so run them concurrently
+        tasks = {}
+        if extract_monsters:
+            tasks["monsters"] = do_extract_monsters(text, provider, model)
+        if extract_spells:
+            tasks["spells"] = do_extract_spells(text, provider, model)
+        if extract_items:
+            tasks["magic_items"] = do_extract_items(text, provider, model)
+        if extract_npcs:
+            tasks["npcs"] = do_extract_npcs(text, provider, model)
+        
+        results = dict(zip(tasks, await asyncio.gather(*tasks.values())))
     
-    if extract_npcs:
-        npcs = await do_extract_npcs(text, provider, model)
-        content.npcs = [NPC(**n) for n in npcs if n]
+    content.monsters = [Monster(**m) for m in results.get("monsters") or [] if m]
+    content.spells = [Spell(**s) for s in results.get("spells") or [] if s]
+    content.magic_items = [MagicItem(**i) for i in results.get("magic_items") or [] if i]
+    content.npcs = [NPC(**n) for n in results.get("npcs") or [] if n]
     
     return content
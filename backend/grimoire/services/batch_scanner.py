@@ -2,17 +2,22 @@
 
 import asyncio
 import logging
+from collections import Counter
 from datetime import datetime, UTC
 from pathlib import Path
 from typing import Any, AsyncGenerator
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from grimoire.models import Product, WatchedFolder, ScanJob, ScanJobStatus
+from grimoire.models import Product, WatchedFolder, ScanJob, ScanJobProgress, ScanJobStatus
 from grimoire.services.scanner import calculate_file_hash
-from grimoire.services.exclusion_service import create_exclusion_matcher, increment_rule_match
-from grimoire.services.duplicate_service import check_and_mark_duplicate, is_deleted_duplicate
+from grimoire.services.exclusion_service import create_exclusion_matcher, record_rule_matches
+from grimoire.services.duplicate_service import (
+    check_and_mark_duplicate,
+    find_duplicates_by_hash,
+    is_deleted_duplicate,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -37,14 +42,7 @@ async def create_scan_job(
 
 async def get_active_scan_job(db: AsyncSession) -> ScanJob | None:
     """Get the currently running scan job, if any."""
-    query = select(ScanJob).where(
-        ScanJob.status.in_([
-            ScanJobStatus.PENDING.value,
-            ScanJobStatus.SCANNING.value,
-            ScanJobStatus.HASHING.value,
-            ScanJobStatus.PROCESSING.value,
-        ])
-    ).order_by(ScanJob.created_at.desc())
+    query = select(ScanJob).where(ScanJob.is_running).order_by(ScanJob.created_at.desc())
     result = await db.execute(query)
     return result.scalar_one_or_none()
 
@@ -120,25 +118,31 @@ async def batch_scan_folder(
     job.current_phase = "Processing files"
     await db.commit()
     
-    new_count = 0
-    updated_count = 0
-    duplicate_count = 0
-    excluded_count = 0
-    error_count = 0
+    # Counters are accumulated in memory and added to the job row in
+    # periodic increments rather than rewritten for every file.
+    progress = ScanJobProgress()
+    rule_matches: Counter[int] = Counter()
     
     for i in range(0, len(all_files), batch_size):
         batch = all_files[i:i + batch_size]
         
+        # New products are written with one upsert per batch. Duplicates are
+        # resolved up front: against the database, or against an earlier new
+        # file in this batch (linked by path once both rows exist).
+        new_rows: list[dict[str, Any]] = []
+        first_path_by_hash: dict[str, str] = {}
+        batch_duplicate_links: list[tuple[str, str]] = []
+        
         for pdf_path, file_size in batch:
-            job.current_file = str(pdf_path)
-            job.processed_files += 1
+            progress.current_file = str(pdf_path)
+            progress.processed_delta += 1
             
             # Check exclusion rules
             should_exclude, matching_rule = exclusion_matcher.should_exclude(pdf_path, file_size)
             if should_exclude:
                 if matching_rule:
-                    await increment_rule_match(db, matching_rule.id)
-                excluded_count += 1
+                    rule_matches[matching_rule.id] += 1
+                progress.excluded_delta += 1
                 continue
             
             file_path_str = str(pdf_path)
@@ -180,38 +184,64 @@ async def batch_scan_folder(
                     existing_product.file_hash = file_hash
                     existing_product.file_modified_at = file_modified
                     existing_product.updated_at = datetime.now(UTC)
-                    updated_count += 1
+                    progress.updated_delta += 1
                     
                     if await check_and_mark_duplicate(db, existing_product):
-                        duplicate_count += 1
+                        progress.dup_delta += 1
                 else:
-                    product = Product(
-                        file_path=file_path_str,
-                        file_name=pdf_path.name,
-                        file_size=file_size,
-                        file_hash=file_hash,
-                        watched_folder_id=folder.id,
-                        file_modified_at=file_modified,
-                        title=pdf_path.stem,
-                    )
-                    db.add(product)
-                    await db.flush()
+                    row = {
+                        "file_path": file_path_str,
+                        "file_name": pdf_path.name,
+                        "file_size": file_size,
+                        "file_hash": file_hash,
+                        "watched_folder_id": folder.id,
+                        "file_modified_at": file_modified,
+                        "title": pdf_path.stem,
+                        "is_duplicate": False,
+                        "duplicate_of_id": None,
+                        "duplicate_reason": None,
+                    }
                     
-                    if await check_and_mark_duplicate(db, product):
-                        duplicate_count += 1
+                    existing = await find_duplicates_by_hash(db, file_hash)
+                    if existing:
+                        canonical = min(existing, key=lambda p: p.created_at)
+                        row["is_duplicate"] = True
+                        row["duplicate_of_id"] = canonical.id
+                        row["duplicate_reason"] = "exact_hash"
+                        progress.dup_delta += 1
+                    elif file_hash in first_path_by_hash:
+                        row["is_duplicate"] = True
+                        row["duplicate_reason"] = "exact_hash"
+                        batch_duplicate_links.append(
+                            (file_path_str, first_path_by_hash[file_hash])
+                        )
+                        progress.dup_delta += 1
+                    else:
+                        first_path_by_hash[file_hash] = file_path_str
                     
-                    new_count += 1
+                    new_rows.append(row)
+                    progress.new_delta += 1
                     
             except Exception as e:
                 logger.error(f"Error processing {pdf_path}: {e}")
-                error_count += 1
+                progress.err_delta += 1
+        
+        await Product.bulk_upsert(db, new_rows)
+        for duplicate_path, canonical_path in batch_duplicate_links:
+            await db.execute(
+                update(Product)
+                .where(Product.file_path == duplicate_path)
+                .values(
+                    duplicate_of_id=select(Product.id)
+                    .where(Product.file_path == canonical_path)
+                    .scalar_subquery()
+                )
+            )
         
-        # Commit batch and update progress
-        job.new_products = new_count
-        job.updated_products = updated_count
-        job.duplicates_found = duplicate_count
-        job.excluded_files = excluded_count
-        job.errors = error_count
+        # Commit batch; progress is only written once enough has accumulated
+        is_last_batch = i + batch_size >= len(all_files)
+        if await progress.flush(db, job.id, force=is_last_batch):
+            await record_rule_matches(db, rule_matches)
         await db.commit()
         
         # Small delay to prevent overwhelming the system
@@ -249,18 +279,18 @@ async def batch_scan_folder(
     await db.commit()
     
     logger.info(
-        f"Scan complete: {new_count} new, {updated_count} updated, "
-        f"{duplicate_count} duplicates, {excluded_count} excluded, {error_count} errors"
+        f"Scan complete: {job.new_products} new, {job.updated_products} updated, "
+        f"{job.duplicates_found} duplicates, {job.excluded_files} excluded, {job.errors} errors"
     )
     
     return {
         "status": "complete",
         "total_files": len(all_files),
-        "new_products": new_count,
-        "updated_products": updated_count,
-        "duplicates_found": duplicate_count,
-        "excluded_files": excluded_count,
-        "errors": error_count,
+        "new_products": job.new_products,
+        "updated_products": job.updated_products,
+        "duplicates_found": job.duplicates_found,
+        "excluded_files": job.excluded_files,
+        "errors": job.errors,
     }
 
 
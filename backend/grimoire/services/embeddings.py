@@ -166,6 +166,44 @@ def find_similar(
     return scores[:top_k]
 
 
+def find_similar_in_matrix(
+    query_embedding: "list[float] | np.ndarray",
+    matrix: np.ndarray,
+    ids: list[int],
+    top_k: int = 10,
+    threshold: float = 0.0,
+) -> list[tuple[int, float]]:
+    """
+    Find most similar rows of a pre-normalized embedding matrix.
+
+    Args:
+        query_embedding: The query vector
+        matrix: (N, dim) float32 matrix with L2-normalized rows
+        ids: Row ids, in the same order as ``matrix``
+        top_k: Number of results to return
+        threshold: Minimum similarity score
+
+    Returns:
+        List of (id, similarity_score) tuples, sorted by score descending
+    """
+    if not ids or top_k <= 0:
+        return []
+
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    if norm == 0:
+        return []
+
+    scores = matrix @ (query / norm)
+    candidates = np.flatnonzero(scores >= threshold)
+    if len(candidates) > top_k:
+        top = np.argpartition(scores[candidates], -top_k)[-top_k:]
+        candidates = candidates[top]
+    candidates = candidates[np.argsort(scores[candidates])[::-1]]
+
+    return [(ids[i], float(scores[i])) for i in candidates]
+
+
 
 
 def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> list[str]:
@@ -1,16 +1,17 @@
 """Service for managing exclusion rules and matching files."""
 
-import fnmatch
 import logging
+import os
 import re
 from datetime import datetime, UTC
 from pathlib import Path
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from grimoire.models import ExclusionRule, ExclusionRuleType, DEFAULT_EXCLUSION_RULES
+from grimoire.models.exclusion import CompiledRule, rule_to_regex
 
 logger = logging.getLogger(__name__)
 
@@ -23,17 +24,41 @@ class ExclusionMatcher:
             [r for r in rules if r.enabled],
             key=lambda r: -r.priority
         )
-        self._compiled_regex: dict[int, re.Pattern] = {}
+        self._compiled: dict[int, CompiledRule] = {}
         self._compile_patterns()
+        self._fuse_path_rules()
     
     def _compile_patterns(self) -> None:
-        """Pre-compile regex patterns for performance."""
+        """Look up each rule's compiled form once, so matching skips the type dispatch."""
         for rule in self.rules:
-            if rule.rule_type == ExclusionRuleType.REGEX.value:
+            compiled = rule.compiled
+            if compiled is None and rule.rule_type == ExclusionRuleType.REGEX.value:
+                logger.warning(f"Invalid regex pattern in rule {rule.id}: {rule.pattern!r}")
+            self._compiled[rule.id] = compiled
+    
+    def _fuse_path_rules(self) -> None:
+        """Fuse folder_name/filename rules into one regex used as a pre-filter.
+        
+        Most files match no rule, so one search rejects all fused rules at
+        once and only the remaining rules are checked one by one. When the
+        fused regex does match, every rule is checked in priority order so
+        the highest-priority match still wins.
+        """
+        parts = []
+        self._unfused_rules: list[ExclusionRule] = []
+        for rule in self.rules:
+            regex = rule_to_regex(rule.rule_type, rule.pattern)
+            if regex is not None:
                 try:
-                    self._compiled_regex[rule.id] = re.compile(rule.pattern)
-                except re.error as e:
-                    logger.warning(f"Invalid regex pattern in rule {rule.id}: {e}")
+                    re.compile(regex)
+                except re.error:
+                    # e.g. a glob with a reversed [z-a] range; fnmatch copes
+                    regex = None
+            if regex is None:
+                self._unfused_rules.append(rule)
+            else:
+                parts.append(regex)
+        self._fused = re.compile("|".join(parts)) if parts else None
     
     def should_exclude(
         self,
@@ -46,44 +71,38 @@ class ExclusionMatcher:
         Returns:
             Tuple of (should_exclude, matching_rule)
         """
-        for rule in self.rules:
+        if self._fused is not None and self._fused.search(str(file_path)):
+            rules = self.rules
+        else:
+            rules = self._unfused_rules
+        for rule in rules:
             if self._matches(rule, file_path, file_size):
                 return True, rule
         return False, None
     
     def _matches(self, rule: ExclusionRule, path: Path, size: int) -> bool:
         """Check if a single rule matches the file."""
-        rule_type = rule.rule_type
-        pattern = rule.pattern
+        compiled = self._compiled[rule.id]
+        if compiled is None:
+            return False
         
+        rule_type = rule.rule_type
         if rule_type == ExclusionRuleType.FOLDER_PATH.value:
-            return fnmatch.fnmatch(str(path.parent), pattern)
-        
-        elif rule_type == ExclusionRuleType.FOLDER_NAME.value:
-            return pattern in path.parts
+            return compiled.match(os.path.normcase(str(path.parent))) is not None
         
         elif rule_type == ExclusionRuleType.FILENAME.value:
-            return fnmatch.fnmatch(path.name, pattern)
-        
-        elif rule_type == ExclusionRuleType.SIZE_MIN.value:
-            try:
-                min_size = int(pattern)
-                return size < min_size
-            except ValueError:
-                return False
-        
-        elif rule_type == ExclusionRuleType.SIZE_MAX.value:
-            try:
-                max_size = int(pattern)
-                return size > max_size
-            except ValueError:
-                return False
+            return compiled.match(os.path.normcase(path.name)) is not None
         
         elif rule_type == ExclusionRuleType.REGEX.value:
-            compiled = self._compiled_regex.get(rule.id)
-            if compiled:
-                return bool(compiled.search(str(path)))
-            return False
+            return compiled.search(str(path)) is not None
+        
+        kind, value = compiled
+        if kind == ExclusionRuleType.FOLDER_NAME.value:
+            return value in path.parts
+        elif kind == ExclusionRuleType.SIZE_MIN.value:
+            return size < value
+        elif kind == ExclusionRuleType.SIZE_MAX.value:
+            return size > value
         
         return False
 
@@ -267,6 +286,24 @@ async def increment_rule_match(
         await db.commit()
 
 
+async def record_rule_matches(
+    db: AsyncSession,
+    counts: dict[int, int],
+) -> None:
+    """Add accumulated match counts for several rules. Does not commit."""
+    now = datetime.now(UTC)
+    for rule_id, count in counts.items():
+        await db.execute(
+            update(ExclusionRule)
+            .where(ExclusionRule.id == rule_id)
+            .values(
+                files_excluded=ExclusionRule.files_excluded + count,
+                last_matched_at=now,
+            )
+        )
+    counts.clear()
+
+
 async def get_exclusion_stats(db: AsyncSession) -> dict[str, Any]:
     """Get statistics about exclusion rules."""
     query = select(ExclusionRule)
@@ -39,16 +39,8 @@ async def handle_cover_task(db: AsyncSession, product: Product) -> bool:
 async def get_setting(db: AsyncSession, key: str, default=None):
     """Get a setting value from the database."""
     from grimoire.models import Setting
-    import json
     
-    result = await db.execute(select(Setting).where(Setting.key == key))
-    setting = result.scalar_one_or_none()
-    if setting:
-        try:
-            return json.loads(setting.value)
-        except (json.JSONDecodeError, TypeError):
-            return setting.value
-    return default
+    return await Setting.get(db, key, default)
 
 
 async def queue_ai_identify_if_enabled(db: AsyncSession, product: Product) -> bool:
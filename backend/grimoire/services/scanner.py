@@ -186,19 +186,12 @@ async def scan_folder(
 async def get_scan_settings(db: AsyncSession) -> dict:
     """Get scan-related settings from the database."""
     from grimoire.models import Setting
-    import json
     
     settings = {}
-    query = select(Setting).where(Setting.key.in_([
-        'auto_extract_text_on_scan',
-        'auto_identify_on_scan',
-    ]))
-    result = await db.execute(query)
-    for setting in result.scalars().all():
-        try:
-            settings[setting.key] = json.loads(setting.value)
-        except (json.JSONDecodeError, TypeError):
-            settings[setting.key] = setting.value
+    for key in ('auto_extract_text_on_scan', 'auto_identify_on_scan'):
+        value = await Setting.get(db, key)
+        if value is not None:
+            settings[key] = value
     
     return settings
 
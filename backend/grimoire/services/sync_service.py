@@ -168,17 +168,9 @@ async def get_codex_settings_from_db(db: AsyncSession) -> tuple[bool, str | None
     Returns:
         Tuple of (contribute_enabled, api_key)
     """
-    # Get API key from database
-    query = select(Setting).where(Setting.key == "codex_api_key")
-    result = await db.execute(query)
-    setting = result.scalar_one_or_none()
-    db_api_key = json.loads(setting.value) if setting else None
-    
-    # Get contribute_enabled from database
-    query = select(Setting).where(Setting.key == "codex_contribute_enabled")
-    result = await db.execute(query)
-    setting = result.scalar_one_or_none()
-    db_contribute_enabled = json.loads(setting.value) if setting else False
+    # Get API key and contribute_enabled from database
+    db_api_key = await Setting.get(db, "codex_api_key")
+    db_contribute_enabled = await Setting.get(db, "codex_contribute_enabled", False)
     
     # Use DB values if set, otherwise fall back to env vars
     api_key = db_api_key or settings.codex_api_key or None
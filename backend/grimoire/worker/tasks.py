@@ -11,10 +11,19 @@ from grimoire.worker.queue import huey
 
 def run_async(coro):
     """Run an async function in a sync context."""
+    from grimoire.processors.ai_identifier import close_ai_clients
+
+    async def _run():
+        try:
+            return await coro
+        finally:
+            # The pooled AI client is per event loop; close it before this loop goes away
+            await close_ai_clients()
+
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     try:
-        return loop.run_until_complete(coro)
+        return loop.run_until_complete(_run())
     finally:
         loop.close()
 
@@ -0,0 +1,4 @@
+-- Migration: Add compression column to product_embeddings
+-- Existing blobs are raw float32 bytes, so they keep a NULL compression
+
+ALTER TABLE product_embeddings ADD COLUMN compression VARCHAR(8);
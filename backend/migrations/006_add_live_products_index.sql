@@ -0,0 +1,9 @@
+-- Migration: Replace the is_duplicate index with a partial "live library" index
+-- Queries filter on is_duplicate = 0 AND is_missing = 0 together, which a
+-- two-valued single-column index can't narrow down
+
+CREATE INDEX IF NOT EXISTS ix_products_live
+    ON products(watched_folder_id, game_system)
+    WHERE is_duplicate = 0 AND is_missing = 0;
+
+DROP INDEX IF EXISTS ix_products_is_duplicate;
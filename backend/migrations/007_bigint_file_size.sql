@@ -0,0 +1,13 @@
+-- Migration: 64-bit file sizes and unique embedding chunks
+-- SQLite INTEGER columns are already 64-bit, so products.file_size needs no
+-- change there. On PostgreSQL run instead:
+--   ALTER TABLE products ALTER COLUMN file_size TYPE BIGINT;
+
+-- Each product has exactly one embedding per chunk_index; keep the oldest
+-- row of any duplicates so the unique index can be built
+DELETE FROM product_embeddings
+WHERE id NOT IN (
+    SELECT MIN(id) FROM product_embeddings GROUP BY product_id, chunk_index
+);
+DROP INDEX IF EXISTS ix_pe_product_chunk;
+CREATE UNIQUE INDEX ix_pe_product_chunk ON product_embeddings(product_id, chunk_index);
@@ -0,0 +1,8 @@
+-- Migration: Case-insensitive and substring title indexes (PostgreSQL only)
+-- SQLite databases already search titles through the products_fts table
+-- (see grimoire/migrations/add_search_columns.py) and need no change.
+--
+-- On PostgreSQL run:
+--   CREATE EXTENSION IF NOT EXISTS pg_trgm;
+--   CREATE INDEX IF NOT EXISTS ix_products_title_lower ON products (lower(title));
+--   CREATE INDEX IF NOT EXISTS ix_products_title_trgm ON products USING gin (title gin_trgm_ops);
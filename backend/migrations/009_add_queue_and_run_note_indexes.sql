@@ -0,0 +1,10 @@
+-- Migration: Index pending queue rows and run note product lookups
+-- The scheduler only ever pulls pending tasks, so the queue index is partial;
+-- run_notes.product_id backs per-product listing and cascade deletes
+
+CREATE INDEX IF NOT EXISTS ix_queue_pending
+    ON processing_queue(priority DESC, created_at)
+    WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS ix_run_notes_product
+    ON run_notes(product_id);